@@ -1,39 +1,153 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from jose import JWTError
+from sqlalchemy import DateTime, inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from app.db.base import get_db
 from app.models.user import User
-from app.core import security
-from app.schemas.user import TokenData
+from app.core import cache, security
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Column snapshots of recently authenticated users, shared across workers
+# through Redis so invalidate_user takes effect everywhere at once. Live ORM
+# instances are bound to the request session, so only plain values are cached
+# and re-attached to the current session on a hit. Secrets are left out;
+# SQLAlchemy lazy-loads them in the few endpoints that read them.
+USER_CACHE_REDIS_TTL = 60
+_REDIS_EXCLUDED_COLUMNS = {"hashed_password", "two_factor_secret"}
+_DATETIME_COLUMNS = {
+    attr.key for attr in sa_inspect(User).column_attrs if isinstance(attr.columns[0].type, DateTime)
+}
+
+
+# Decoded bearer tokens, so a token presented repeatedly within its lifetime
+# skips signature verification. Rejected tokens are remembered briefly too.
+_token_cache: TTLCache = TTLCache(maxsize=8192, ttl=60)
+_invalid_token_cache: TTLCache = TTLCache(maxsize=8192, ttl=10)
+_token_cache_lock = threading.Lock()
+
+
+def _decode_token(token: str) -> Optional[str]:
+    """Return the token subject, or None if the token is invalid or expired."""
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+        rejected = token in _invalid_token_cache
+    if rejected:
+        return None
+    if cached is not None:
+        subject, expires_at = cached
+        if expires_at is None or expires_at > time.time():
+            return subject
+
+    try:
+        payload = security.decode_token(token)
+    except JWTError:
+        with _token_cache_lock:
+            _invalid_token_cache[token] = True
+        return None
+
+    subject = payload.get("sub")
+    if subject is None:
+        return None
+    with _token_cache_lock:
+        _token_cache[token] = (subject, payload.get("exp"))
+    return subject
+
+
+def _user_cache_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def _snapshot_user(user: User) -> Dict[str, Any]:
+    return {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+
+
+def _load_redis_snapshot(user_id: int) -> Optional[Dict[str, Any]]:
+    snapshot = cache.get_json(_user_cache_key(user_id))
+    if not isinstance(snapshot, dict):
+        return None
+    for key in _DATETIME_COLUMNS:
+        if isinstance(snapshot.get(key), str):
+            snapshot[key] = datetime.fromisoformat(snapshot[key])
+    return snapshot
+
+
+def _store_redis_snapshot(user_id: int, snapshot: Dict[str, Any]) -> None:
+    shared = {key: value for key, value in snapshot.items() if key not in _REDIS_EXCLUDED_COLUMNS}
+    cache.set_json(_user_cache_key(user_id), shared, USER_CACHE_REDIS_TTL)
+
+
+def _user_from_snapshot(db: Session, snapshot: Dict[str, Any]) -> User:
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def _user_id(user: Union[User, int, None]) -> Optional[int]:
+    """The user's id, read from the identity key so an expired instance isn't reloaded."""
+    if isinstance(user, User):
+        identity = sa_inspect(user).identity
+        return identity[0] if identity else None
+    return user
+
+
+def invalidate_user(user: Union[User, int, None]) -> None:
+    """Drop the cached snapshot of a user whose row has just been modified.
+
+    Accepts the User instance itself so callers can invalidate right after a
+    commit without touching expired attributes (which would reload the row).
+    """
+    user_id = _user_id(user)
+    if user_id is not None:
+        cache.delete(_user_cache_key(user_id))
+
+
+def resource_stats_cache_key(user_id: int) -> str:
+    return f"resources:stats:{user_id}"
+
+
+def invalidate_resource_stats(user: Union[User, int, None]) -> None:
+    """Drop the cached /resources/stats payload after a user's resources or credentials change.
+
+    Call it after the commit, so a concurrent /stats request can't cache the
+    old rows again.
+    """
+    user_id = _user_id(user)
+    if user_id is not None:
+        cache.delete(resource_stats_cache_key(user_id))
+
+
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(email=username)
-    except JWTError:
+    username = _decode_token(token)
+    if username is None:
         raise credentials_exception
-        
+
     # Here 'sub' stored as user.id (integer) in login, but schema expects email?
     # Wait, in security.py create_access_token used str(user.id).
     # So username is actually user_id string.
-    
-    try:
-        user_id = int(username)
-        user = db.query(User).filter(User.id == user_id).first()
-    except ValueError:
-        user = None
 
+    if not (username.isascii() and username.isdigit()):
+        raise credentials_exception
+    user_id = int(username)
+
+    snapshot = _load_redis_snapshot(user_id)
+    if snapshot is not None:
+        return _user_from_snapshot(db, snapshot)
+
+    user = db.get(User, user_id)
     if user is None:
         raise credentials_exception
+    _store_redis_snapshot(user_id, _snapshot_user(user))
     return user
@@ -8,10 +8,15 @@ import requests
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
+from sqlalchemy import and_, case, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
-from app.db.base import get_db
+from app.api.deps import get_current_user, invalidate_user
+from app.db.base import get_async_db, get_db
 from app.models.user import User
 from app.schemas.user import (
     ChangePasswordRequest,
@@ -26,6 +31,7 @@ from app.schemas.user import (
     UserResponse,
 )
 from app.core import security
+from app.core.rate_limit import AUTH_RATE_LIMIT, limiter
 from app.services.two_factor import TwoFactorService
 from app.services.sso import SSOService, oauth
 from app.services.subscription import (
@@ -171,12 +177,12 @@ def _create_sso_state(provider: str, frontend_redirect: str) -> str:
         "nonce": secrets.token_urlsafe(12),
         "exp": datetime.utcnow() + timedelta(minutes=SSO_STATE_EXPIRE_MINUTES),
     }
-    return jwt.encode(payload, security.SECRET_KEY, algorithm=security.ALGORITHM)
+    return security.encode_token(payload)
 
 
 def _decode_sso_state(state: str, provider: str) -> Dict[str, Any]:
     try:
-        payload = jwt.decode(state, security.SECRET_KEY, algorithms=[security.ALGORITHM])
+        payload = security.decode_token(state)
     except JWTError as exc:
         raise HTTPException(status_code=400, detail="Invalid or expired SSO state") from exc
 
@@ -331,6 +337,7 @@ def _get_or_create_sso_user(db: Session, email: str, full_name: str) -> User:
             db.add(user)
             db.commit()
             db.refresh(user)
+            invalidate_user(user.id)
         return user
 
     random_password = secrets.token_urlsafe(32)
@@ -462,13 +469,8 @@ def sso_callback(
 
 
 @router.post("/register", response_model=UserResponse)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_in.email).first()
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="The user with this username already exists in the system.",
-        )
+@limiter.limit(AUTH_RATE_LIMIT)
+def register(request: Request, user_in: UserCreate, db: Session = Depends(get_db)):
     user = User(
         email=user_in.email,
         hashed_password=security.get_password_hash(user_in.password),
@@ -484,17 +486,28 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
         is_superuser=False,
     )
     db.add(user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="The user with this username already exists in the system.",
+        )
     db.refresh(user)
     return _serialize_user(user)
 
 
 @router.post("/login", response_model=Token)
+@limiter.limit(AUTH_RATE_LIMIT)
 def login_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    request: Request, db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user:
+        security.dummy_verify_password()
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if not security.verify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
 
     access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -526,10 +539,11 @@ def update_profile(
     if profile_in.phone_number is not None:
         current_user.phone_number = profile_in.phone_number
 
-    db.add(current_user)
+    # Serialize before commit so the expired instance is not reloaded
+    response = _serialize_user(current_user)
     db.commit()
-    db.refresh(current_user)
-    return _serialize_user(current_user)
+    invalidate_user(current_user)
+    return response
 
 
 @router.post("/subscription-plan", response_model=UserResponse)
@@ -542,24 +556,27 @@ def update_subscription_plan(
     current_plan = get_user_subscription_plan(current_user)
 
     if requested_plan == current_plan:
+        response = _serialize_user(current_user)
         # Ensure canonical storage (e.g. aliases) without forcing clients to refetch.
         if (current_user.subscription_plan or "").strip().lower() != requested_plan:
             current_user.subscription_plan = requested_plan
-            db.add(current_user)
             db.commit()
-            db.refresh(current_user)
-        return _serialize_user(current_user)
+            invalidate_user(current_user)
+        return response
 
     enforce_plan_change_allowed(db, current_user, requested_plan)
     current_user.subscription_plan = requested_plan
-    db.add(current_user)
+    # Serialize before commit so the expired instance is not reloaded
+    response = _serialize_user(current_user)
     db.commit()
-    db.refresh(current_user)
-    return _serialize_user(current_user)
+    invalidate_user(current_user)
+    return response
 
 
 @router.post("/change-password")
+@limiter.limit(AUTH_RATE_LIMIT)
 def change_password(
+    request: Request,
     payload: ChangePasswordRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -578,8 +595,8 @@ def change_password(
 
     current_user.hashed_password = security.get_password_hash(payload.new_password)
     current_user.last_password_change = datetime.utcnow()
-    db.add(current_user)
     db.commit()
+    invalidate_user(current_user)
     return {"message": "Password changed successfully"}
 
 
@@ -590,10 +607,11 @@ def set_two_factor(
     current_user: User = Depends(get_current_user),
 ) -> UserResponse:
     current_user.two_factor_enabled = payload.enabled
-    db.add(current_user)
+    # Serialize before commit so the expired instance is not reloaded
+    response = _serialize_user(current_user)
     db.commit()
-    db.refresh(current_user)
-    return _serialize_user(current_user)
+    invalidate_user(current_user)
+    return response
 
 
 # ===== 2FA Endpoints =====
@@ -616,8 +634,8 @@ def setup_two_factor(
     
     # Store secret temporarily (will be confirmed on verification)
     current_user.two_factor_secret = secret
-    db.add(current_user)
     db.commit()
+    invalidate_user(current_user)
     
     return {
         "secret": secret,
@@ -646,8 +664,8 @@ def verify_two_factor(
         )
     
     current_user.two_factor_enabled = True
-    db.add(current_user)
     db.commit()
+    invalidate_user(current_user)
     
     return {"message": "2FA enabled successfully"}
 
@@ -673,14 +691,16 @@ def disable_two_factor(
     
     current_user.two_factor_enabled = False
     current_user.two_factor_secret = None
-    db.add(current_user)
     db.commit()
+    invalidate_user(current_user)
     
     return {"message": "2FA disabled successfully"}
 
 
 @router.post("/login/2fa", response_model=Token)
+@limiter.limit(AUTH_RATE_LIMIT)
 def login_with_2fa(
+    request: Request,
     email: str,
     password: str,
     token: str,
@@ -688,7 +708,10 @@ def login_with_2fa(
 ) -> dict:
     """Login with 2FA token"""
     user = db.query(User).filter(User.email == email).first()
-    if not user or not security.verify_password(password, user.hashed_password):
+    if not user:
+        security.dummy_verify_password()
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if not security.verify_password(password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
     if user.two_factor_enabled:
@@ -706,6 +729,63 @@ def login_with_2fa(
 
 # ===== SSO Endpoints =====
 
+async def _upsert_google_user(db: AsyncSession, email: str, full_name: Optional[str], google_id: str) -> Tuple[int, bool]:
+    """Create the Google SSO user or link Google to an existing account in one statement.
+
+    Returns the user id and whether the row was newly inserted.
+    """
+    users = User.__table__
+    stmt = pg_insert(users).values(
+        email=email,
+        full_name=full_name,
+        sso_provider='google',
+        sso_id=google_id,
+        hashed_password=None,
+        two_factor_enabled=False,
+        is_superuser=False,
+    )
+    # Existing accounts only pick up Google when no SSO provider is linked yet
+    keep_existing = and_(users.c.sso_provider.isnot(None), users.c.sso_provider != '')
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[users.c.email],
+        set_={
+            'sso_provider': case((keep_existing, users.c.sso_provider), else_=stmt.excluded.sso_provider),
+            'sso_id': case((keep_existing, users.c.sso_id), else_=stmt.excluded.sso_id),
+        },
+    ).returning(users.c.id, literal_column("xmax = 0"))
+    user_id, inserted = (await db.execute(stmt)).one()
+    await db.commit()
+    if not inserted:
+        invalidate_user(user_id)
+    return user_id, bool(inserted)
+
+
+async def _get_or_create_google_user(db: AsyncSession, email: str, full_name: Optional[str], google_id: str) -> Tuple[int, bool]:
+    """Portable fallback for databases without INSERT ... ON CONFLICT."""
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user:
+        user = User(
+            email=email,
+            full_name=full_name,
+            sso_provider='google',
+            sso_id=google_id,
+            hashed_password=None,
+            two_factor_enabled=False,
+            is_superuser=False,
+        )
+        db.add(user)
+        await db.commit()
+        return user.id, True
+
+    # Update SSO info if not set
+    if not user.sso_provider:
+        user.sso_provider = 'google'
+        user.sso_id = google_id
+        await db.commit()
+        invalidate_user(user.id)
+    return user.id, False
+
+
 @router.get("/sso/google/login")
 async def google_login(request: Request):
     """Redirect to Google OAuth"""
@@ -714,7 +794,7 @@ async def google_login(request: Request):
 
 
 @router.get("/sso/google/callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
+async def google_callback(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle Google OAuth callback"""
     try:
         token = await oauth.google.authorize_access_token(request)
@@ -723,37 +803,15 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         email = user_info.get('email')
         google_id = user_info.get('sub')
         
-        # Check if user exists
-        user = db.query(User).filter(User.email == email).first()
-        is_new_user = False
-        
-        if not user:
-            # Create new user
-            user = User(
-                email=email,
-                full_name=user_info.get('name'),
-                sso_provider='google',
-                sso_id=google_id,
-                hashed_password=None,
-                two_factor_enabled=False,
-                is_superuser=False,
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-            is_new_user = True
+        if db.bind.dialect.name == "postgresql":
+            user_id, is_new_user = await _upsert_google_user(db, email, user_info.get('name'), google_id)
         else:
-            # Update SSO info if not set
-            if not user.sso_provider:
-                user.sso_provider = 'google'
-                user.sso_id = google_id
-                db.add(user)
-                db.commit()
+            user_id, is_new_user = await _get_or_create_google_user(db, email, user_info.get('name'), google_id)
         
         # Generate access token
         access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = security.create_access_token(
-            user.id, expires_delta=access_token_expires
+            user_id, expires_delta=access_token_expires
         )
         
         # Redirect to frontend with token
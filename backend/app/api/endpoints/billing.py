@@ -2,29 +2,39 @@
 Billing and Cost API Endpoints
 Provides cost analytics and billing information
 """
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.db.base import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import get_async_db
 from app.models.user import User
 from app.models.resource_inventory import CostData
 from app.api.deps import get_current_user
 from datetime import datetime, timedelta
 from typing import Optional
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Cost summaries only change when new cost records are ingested, so they are
+# cached per user and hour bucket.
+_summary_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+_summary_cache_lock = threading.Lock()
+
+_total_cost = func.coalesce(func.sum(CostData.cost_amount), 0.0)
+
 
 @router.get("/costs")
-def get_cost_data(
+async def get_cost_data(
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     provider: Optional[str] = Query(None, description="Filter by provider"),
     group_by: Optional[str] = Query("service", description="Group by: service, provider, or day"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get cost data with optional date range and grouping
@@ -45,50 +55,52 @@ def get_cost_data(
         start_dt = datetime.strptime(start_date, '%Y-%m-%d')
         end_dt = datetime.strptime(end_date, '%Y-%m-%d')
         
-        # Query cost data
-        query = db.query(CostData).filter(
+        # Aggregate in the database; only one row per group comes back
+        filters = [
             CostData.user_id == current_user.id,
             CostData.period_start >= start_dt,
-            CostData.period_end <= end_dt
-        )
-        
+            CostData.period_end <= end_dt,
+        ]
         if provider:
-            query = query.filter(CostData.provider == provider.lower())
+            filters.append(CostData.provider == provider.lower())
         
-        cost_records = query.all()
-        
-        # Calculate total
-        total_cost = sum(c.cost_amount for c in cost_records)
-        
-        # Group data
+        cost_sum = func.sum(CostData.cost_amount)
         breakdown = []
         
-        if group_by == 'service':
-            service_costs = {}
-            for cost in cost_records:
-                service = cost.service_name or 'Other'
-                if service not in service_costs:
-                    service_costs[service] = {'service': service, 'cost': 0, 'provider': cost.provider.upper()}
-                service_costs[service]['cost'] += cost.cost_amount
-            breakdown = list(service_costs.values())
-            
-        elif group_by == 'provider':
-            provider_costs = {}
-            for cost in cost_records:
-                prov = cost.provider.upper()
-                if prov not in provider_costs:
-                    provider_costs[prov] = {'provider': prov, 'cost': 0}
-                provider_costs[prov]['cost'] += cost.cost_amount
-            breakdown = list(provider_costs.values())
+        if group_by == 'day':
+            day_col = func.date(CostData.period_start)
+            rows = (await db.execute(select(day_col, cost_sum).where(*filters).group_by(day_col))).all()
+            total_cost = sum(cost for _, cost in rows)
+            # func.date returns a date on PostgreSQL and an ISO string on SQLite
+            breakdown = sorted(
+                ({'date': str(day)[:10], 'cost': cost} for day, cost in rows),
+                key=lambda x: x['date']
+            )
+        else:
+            rows = (await db.execute(
+                select(CostData.service_name, CostData.provider, cost_sum)
+                .where(*filters)
+                .group_by(CostData.service_name, CostData.provider)
+            )).all()
+            total_cost = sum(cost for _, _, cost in rows)
             
-        elif group_by == 'day':
-            daily_costs = {}
-            for cost in cost_records:
-                day = cost.period_start.strftime('%Y-%m-%d')
-                if day not in daily_costs:
-                    daily_costs[day] = {'date': day, 'cost': 0}
-                daily_costs[day]['cost'] += cost.cost_amount
-            breakdown = sorted(daily_costs.values(), key=lambda x: x['date'])
+            if group_by == 'service':
+                service_costs = {}
+                for service_name, prov, cost in rows:
+                    service = service_name or 'Other'
+                    if service not in service_costs:
+                        service_costs[service] = {'service': service, 'cost': 0, 'provider': prov.upper()}
+                    service_costs[service]['cost'] += cost
+                breakdown = list(service_costs.values())
+                
+            elif group_by == 'provider':
+                provider_costs = {}
+                for _, prov, cost in rows:
+                    prov = prov.upper()
+                    if prov not in provider_costs:
+                        provider_costs[prov] = {'provider': prov, 'cost': 0}
+                    provider_costs[prov]['cost'] += cost
+                breakdown = list(provider_costs.values())
         
         # Round costs
         for item in breakdown:
@@ -108,121 +120,117 @@ def get_cost_data(
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
-    except Exception as e:
-        logger.error(f"Error fetching cost data: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching cost data: {str(e)}")
 
 
 @router.get("/summary")
-def get_cost_summary(
+async def get_cost_summary(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get cost summary for current month and last month
     """
-    try:
-        now = datetime.utcnow()
-        
-        # Current month
-        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        current_month_costs = db.query(CostData).filter(
-            CostData.user_id == current_user.id,
-            CostData.period_start >= current_month_start
-        ).all()
-        current_month_total = sum(c.cost_amount for c in current_month_costs)
-        
-        # Last month
-        last_month_end = current_month_start - timedelta(days=1)
-        last_month_start = last_month_end.replace(day=1)
-        last_month_costs = db.query(CostData).filter(
-            CostData.user_id == current_user.id,
-            CostData.period_start >= last_month_start,
-            CostData.period_end <= last_month_end
-        ).all()
-        last_month_total = sum(c.cost_amount for c in last_month_costs)
-        
-        # Calculate change
-        if last_month_total > 0:
-            change_percent = ((current_month_total - last_month_total) / last_month_total) * 100
-        else:
-            change_percent = 0 if current_month_total == 0 else 100
-        
-        return {
-            'current_month': {
-                'period': current_month_start.strftime('%Y-%m'),
-                'total': round(current_month_total, 2)
-            },
-            'last_month': {
-                'period': last_month_start.strftime('%Y-%m'),
-                'total': round(last_month_total, 2)
-            },
-            'change_percent': round(change_percent, 2),
-            'currency': 'USD'
-        }
-        
-    except Exception as e:
-        logger.error(f"Error fetching cost summary: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching cost summary: {str(e)}")
+    now = datetime.utcnow()
+    cache_key = (current_user.id, now.strftime('%Y-%m-%d-%H'))
+    with _summary_cache_lock:
+        cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Current month
+    current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    current_month_total = await db.scalar(select(_total_cost).where(
+        CostData.user_id == current_user.id,
+        CostData.period_start >= current_month_start
+    ))
+    
+    # Last month
+    last_month_end = current_month_start - timedelta(days=1)
+    last_month_start = last_month_end.replace(day=1)
+    last_month_total = await db.scalar(select(_total_cost).where(
+        CostData.user_id == current_user.id,
+        CostData.period_start >= last_month_start,
+        CostData.period_end <= last_month_end
+    ))
+    
+    # Calculate change
+    if last_month_total > 0:
+        change_percent = ((current_month_total - last_month_total) / last_month_total) * 100
+    else:
+        change_percent = 0 if current_month_total == 0 else 100
+    
+    summary = {
+        'current_month': {
+            'period': current_month_start.strftime('%Y-%m'),
+            'total': round(current_month_total, 2)
+        },
+        'last_month': {
+            'period': last_month_start.strftime('%Y-%m'),
+            'total': round(last_month_total, 2)
+        },
+        'change_percent': round(change_percent, 2),
+        'currency': 'USD'
+    }
+    with _summary_cache_lock:
+        _summary_cache[cache_key] = summary
+    return summary
 
 
 @router.get("/overview")
-def get_billing_overview(
+async def get_billing_overview(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Consolidated billing data for charts and dashboard summary
     """
-    try:
-        now = datetime.utcnow()
-        thirty_days_ago = now - timedelta(days=30)
-        
-        # 1. Monthly costs for summary
-        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        current_costs = db.query(CostData).filter(
-            CostData.user_id == current_user.id,
-            CostData.period_start >= current_month_start
-        ).all()
-        current_total = sum(c.cost_amount for c in current_costs)
-        
-        last_month_end = current_month_start - timedelta(days=1)
-        last_month_start = last_month_end.replace(day=1)
-        last_costs = db.query(CostData).filter(
-            CostData.user_id == current_user.id,
-            CostData.period_start >= last_month_start,
-            CostData.period_end <= last_month_end
-        ).all()
-        last_total = sum(c.cost_amount for c in last_costs)
-        
-        # 2. Daily Trend for charts
-        trend_records = db.query(CostData).filter(
-            CostData.user_id == current_user.id,
-            CostData.period_start >= thirty_days_ago
-        ).order_by(CostData.period_start.asc()).all()
-        
-        daily_map = {}
-        for r in trend_records:
-            day_str = r.period_start.strftime('%m-%d')
-            daily_map[day_str] = daily_map.get(day_str, 0) + r.cost_amount
-            
-        cost_trend = [{"date": d, "cost": round(c, 2)} for d, c in daily_map.items()]
-        
-        # 3. Provider breakdown
-        prov_map = {}
-        for r in trend_records:
-            p = r.provider.upper()
-            prov_map[p] = prov_map.get(p, 0) + r.cost_amount
-            
-        cost_by_provider = [{"provider": p, "cost": round(c, 2)} for p, c in prov_map.items()]
-        
-        return {
-            "current_month_cost": round(current_total, 2),
-            "last_month_cost": round(last_total, 2),
-            "cost_by_provider": cost_by_provider,
-            "cost_trend": cost_trend,
-            "currency": "USD"
-        }
-    except Exception as e:
-        logger.error(f"Error fetching billing overview: {e}")
-        raise HTTPException(status_code=500, detail="Error generating billing report")
+    now = datetime.utcnow()
+    thirty_days_ago = now - timedelta(days=30)
+    
+    # 1. Monthly costs for summary
+    current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    current_total = await db.scalar(select(_total_cost).where(
+        CostData.user_id == current_user.id,
+        CostData.period_start >= current_month_start
+    ))
+    
+    last_month_end = current_month_start - timedelta(days=1)
+    last_month_start = last_month_end.replace(day=1)
+    last_total = await db.scalar(select(_total_cost).where(
+        CostData.user_id == current_user.id,
+        CostData.period_start >= last_month_start,
+        CostData.period_end <= last_month_end
+    ))
+    
+    trend_filters = (
+        CostData.user_id == current_user.id,
+        CostData.period_start >= thirty_days_ago
+    )
+    
+    # 2. Daily Trend for charts
+    day_col = func.date(CostData.period_start)
+    daily_rows = (await db.execute(
+        select(day_col, func.sum(CostData.cost_amount))
+        .where(*trend_filters)
+        .group_by(day_col)
+        .order_by(day_col.asc())
+    )).all()
+    # func.date returns a date on PostgreSQL and an ISO string on SQLite
+    cost_trend = [{"date": str(d)[5:10], "cost": round(c, 2)} for d, c in daily_rows]
+    
+    # 3. Provider breakdown
+    provider_col = func.upper(CostData.provider)
+    provider_rows = (await db.execute(
+        select(provider_col, func.sum(CostData.cost_amount))
+        .where(*trend_filters)
+        .group_by(provider_col)
+    )).all()
+    cost_by_provider = [{"provider": p, "cost": round(c, 2)} for p, c in provider_rows]
+    
+    return {
+        "current_month_cost": round(current_total, 2),
+        "last_month_cost": round(last_total, 2),
+        "cost_by_provider": cost_by_provider,
+        "cost_trend": cost_trend,
+        "currency": "USD"
+    }
@@ -1,10 +1,11 @@
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
-from app.db.base import get_db
+from app.db.base import get_db, get_readonly_db
 from app.models.blueprint import Blueprint
 from app.models.user import User
 from app.schemas.blueprint import BlueprintCreate, BlueprintResponse
@@ -16,15 +17,28 @@ router = APIRouter()
 def list_blueprints(
     provider: Optional[str] = Query(None),
     resource_type: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_readonly_db),
     current_user: User = Depends(get_current_user),
 ):
-    query = db.query(Blueprint).filter(Blueprint.user_id == current_user.id)
+    # Plain column rows are enough for BlueprintResponse; skip ORM hydration
+    query = db.query(
+        Blueprint.id,
+        Blueprint.name,
+        Blueprint.description,
+        Blueprint.provider,
+        Blueprint.resource_type,
+        Blueprint.template,
+        Blueprint.uses_count,
+        Blueprint.created_at,
+        Blueprint.updated_at,
+    ).filter(Blueprint.user_id == current_user.id)
     if provider:
         query = query.filter(Blueprint.provider == provider.lower())
     if resource_type:
         query = query.filter(Blueprint.resource_type == resource_type.lower())
-    return query.order_by(Blueprint.updated_at.desc(), Blueprint.id.desc()).all()
+    rows = query.order_by(Blueprint.updated_at.desc(), Blueprint.id.desc()).all()
+    # Rows come straight from the database, so skip re-validation
+    return [BlueprintResponse.model_construct(**row._mapping) for row in rows]
 
 
 @router.post("/", response_model=BlueprintResponse)
@@ -33,14 +47,6 @@ def create_blueprint(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    existing = (
-        db.query(Blueprint)
-        .filter(Blueprint.user_id == current_user.id, Blueprint.name == blueprint_in.name)
-        .first()
-    )
-    if existing:
-        raise HTTPException(status_code=400, detail="Blueprint name already exists")
-
     blueprint = Blueprint(
         user_id=current_user.id,
         name=blueprint_in.name.strip(),
@@ -50,7 +56,11 @@ def create_blueprint(
         template=blueprint_in.template or {},
     )
     db.add(blueprint)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Blueprint name already exists")
     db.refresh(blueprint)
     return blueprint
 
@@ -61,12 +71,8 @@ def mark_blueprint_used(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    blueprint = (
-        db.query(Blueprint)
-        .filter(Blueprint.id == blueprint_id, Blueprint.user_id == current_user.id)
-        .first()
-    )
-    if not blueprint:
+    blueprint = db.get(Blueprint, blueprint_id)
+    if not blueprint or blueprint.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Blueprint not found")
 
     blueprint.uses_count += 1
@@ -82,12 +88,8 @@ def delete_blueprint(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    blueprint = (
-        db.query(Blueprint)
-        .filter(Blueprint.id == blueprint_id, Blueprint.user_id == current_user.id)
-        .first()
-    )
-    if not blueprint:
+    blueprint = db.get(Blueprint, blueprint_id)
+    if not blueprint or blueprint.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Blueprint not found")
 
     db.delete(blueprint)
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-import json
+import orjson
 
-from app.db.base import get_db
+from app.db.base import get_db, get_readonly_db
 from app.models.credential import CloudCredential
 from app.models.user import User
 from app.schemas.credential import CredentialCreate, CredentialResponse
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, invalidate_resource_stats
 from app.core.security import encrypt_data
 from app.services.subscription import enforce_cloud_account_limit
 
@@ -23,9 +23,8 @@ def create_credential(
 
     # Check if credential already exists for this provider (optional constraint, skip for now)
     
-    # Encrypt the data dict
-    json_str = json.dumps(cred.data)
-    encrypted = encrypt_data(json_str)
+    # Encrypt the data dict (orjson produces bytes, which go to the cipher as-is)
+    encrypted = encrypt_data(orjson.dumps(cred.data))
     
     db_cred = CloudCredential(
         name=cred.name,
@@ -36,16 +35,24 @@ def create_credential(
     
     db.add(db_cred)
     db.commit()
+    invalidate_resource_stats(current_user)
     db.refresh(db_cred)
     return db_cred
 
 @router.get("/list", response_model=List[CredentialResponse])
 def read_credentials(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_readonly_db)
 ):
-    creds = db.query(CloudCredential).filter(CloudCredential.user_id == current_user.id).all()
-    return creds
+    # encrypted_data is never returned, so it is not read here either
+    creds = db.query(
+        CloudCredential.id,
+        CloudCredential.provider,
+        CloudCredential.name,
+        CloudCredential.created_at,
+    ).filter(CloudCredential.user_id == current_user.id).all()
+    # Rows come straight from the database, so skip re-validation
+    return [CredentialResponse.model_construct(**row._mapping) for row in creds]
 
 @router.delete("/{credential_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_credential(
@@ -53,10 +60,11 @@ def delete_credential(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    cred = db.query(CloudCredential).filter(CloudCredential.id == credential_id, CloudCredential.user_id == current_user.id).first()
-    if not cred:
+    cred = db.get(CloudCredential, credential_id)
+    if not cred or cred.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Credential not found")
         
     db.delete(cred)
     db.commit()
+    invalidate_resource_stats(current_user)
     return None
@@ -2,26 +2,344 @@
 Dashboard API Endpoints
 Provides real-time statistics and metrics for the dashboard
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.base import get_db
+from sqlalchemy import and_, case, func, or_, select
+from app.db.base import get_async_sessionmaker, get_db
 from app.models.user import User
-from app.models.resource_inventory import ResourceInventory, CostData, ProviderHealth
+from app.models.resource_inventory import ResourceInventory, CostData, CostDataDaily, ProviderHealth
 from app.api.deps import get_current_user
+from app.core import cache
 from datetime import datetime, timedelta
 from typing import Dict, List
+import asyncio
+import hashlib
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+NETWORK_TYPES = ['vpc', 'network', 'resource_group', 'vnet']
+_IS_VM = ResourceInventory.resource_type == 'vm'
+_IS_STORAGE = ResourceInventory.resource_type == 'storage'
+
+# Dashboard stats only move when a cloud sync lands, so they are served from
+# Redis: fresh for a minute, then served stale while being recomputed.
+STATS_CACHE_FRESH_SECONDS = 60
+STATS_CACHE_STALE_SECONDS = 300
+STATS_CACHE_CONTROL = 'private, max-age=30'
+
+# Cost service buckets; a service belongs to a bucket when its name contains
+# any of the keywords. The match runs in SQL as LIKE '%keyword%'.
+COMPUTE_SERVICES = ['EC2', 'Compute', 'Virtual Machines', 'Compute Engine']
+STORAGE_SERVICES = ['S3', 'Storage', 'Blob Storage', 'Cloud Storage']
+_IS_COMPUTE_SERVICE = or_(*(CostDataDaily.service_name.contains(s, autoescape=True) for s in COMPUTE_SERVICES))
+_IS_STORAGE_SERVICE = or_(*(CostDataDaily.service_name.contains(s, autoescape=True) for s in STORAGE_SERVICES))
+
+
+def _stats_cache_key(user_id: int) -> str:
+    return f"dash:stats:{user_id}"
+
+
+async def _query_inventory(user_id: int, today_start: datetime):
+    """Inventory counts, provider breakdown and top regions."""
+    created_today = ResourceInventory.created_at >= today_start
+    inventory_provider = func.upper(ResourceInventory.provider)
+    # Missing and blank regions are one 'unknown' bucket
+    inventory_region = func.coalesce(func.nullif(ResourceInventory.region, ''), 'unknown')
+    async with get_async_sessionmaker()() as db:
+        # All scalar inventory counts in one scan using conditional aggregates
+        counts = (await db.execute(select(
+            func.count().label('total'),
+            func.count().filter(and_(_IS_VM, ResourceInventory.status.in_(['running', 'RUNNING']))).label('active_vms'),
+            func.count().filter(_IS_VM).label('vms'),
+            func.count().filter(
+                and_(_IS_VM, ResourceInventory.status.in_(['running', 'RUNNING', 'active', 'ACTIVE']))
+            ).label('running_vms'),
+            func.count().filter(_IS_STORAGE).label('storage'),
+            func.count().filter(ResourceInventory.resource_type.in_(NETWORK_TYPES)).label('networks'),
+            func.count().filter(created_today).label('resources_today'),
+            func.count().filter(and_(created_today, _IS_STORAGE)).label('storage_today'),
+            func.count().filter(
+                and_(created_today, ResourceInventory.resource_type.in_(['vpc', 'network', 'vnet']))
+            ).label('networks_today'),
+        ).where(
+            ResourceInventory.user_id == user_id
+        ))).one()
+        
+        # Provider breakdown, grouped on the display (uppercase) provider name
+        provider_rows = (await db.execute(select(
+            inventory_provider,
+            func.count(),
+            func.count().filter(_IS_VM),
+            func.count().filter(_IS_STORAGE)
+        ).where(
+            ResourceInventory.user_id == user_id
+        ).group_by(inventory_provider))).all()
+        
+        # Region distribution (top 10 regions)
+        region_rows = (await db.execute(select(
+            inventory_region,
+            func.count().label('count')
+        ).where(
+            ResourceInventory.user_id == user_id
+        ).group_by(inventory_region).order_by(func.count().desc(), inventory_region).limit(10))).all()
+    
+    return counts, provider_rows, region_rows
+
+
+async def _query_costs(user_id: int, thirty_days_ago: datetime, sixty_days_ago: datetime):
+    """
+    Cost totals for the last 30 days (and the 30 before) and per-provider costs.
+    
+    Read from the daily roll-up (cost_data_daily), so whole days are summed.
+    """
+    in_current_period = CostDataDaily.day >= thirty_days_ago.date()
+    cost_provider = func.upper(CostDataDaily.provider)
+    async with get_async_sessionmaker()() as db:
+        cost_totals = (await db.execute(select(
+            func.coalesce(func.sum(case((in_current_period, CostDataDaily.cost_amount), else_=0.0)), 0.0).label('current'),
+            func.coalesce(func.sum(case((in_current_period, 0.0), else_=CostDataDaily.cost_amount)), 0.0).label('previous'),
+            func.coalesce(func.sum(case(
+                (and_(in_current_period, _IS_COMPUTE_SERVICE), CostDataDaily.cost_amount), else_=0.0
+            )), 0.0).label('compute'),
+            func.coalesce(func.sum(case(
+                (and_(in_current_period, _IS_STORAGE_SERVICE), CostDataDaily.cost_amount), else_=0.0
+            )), 0.0).label('storage'),
+        ).where(
+            CostDataDaily.user_id == user_id,
+            CostDataDaily.day >= sixty_days_ago.date()
+        ))).one()
+        
+        provider_cost_rows = (await db.execute(select(
+            cost_provider,
+            func.sum(CostDataDaily.cost_amount)
+        ).where(
+            CostDataDaily.user_id == user_id,
+            in_current_period
+        ).group_by(cost_provider))).all()
+    
+    return cost_totals, provider_cost_rows
+
+
+async def _query_activity(user_id: int):
+    """Provider health records and the last 10 synced resources."""
+    async with get_async_sessionmaker()() as db:
+        health_records = (await db.execute(select(ProviderHealth).where(
+            ProviderHealth.user_id == user_id
+        ))).scalars().all()
+        
+        recent_resources = (await db.execute(select(ResourceInventory).where(
+            ResourceInventory.user_id == user_id
+        ).order_by(ResourceInventory.last_synced_at.desc()).limit(10))).scalars().all()
+    
+    return health_records, recent_resources
+
+
+async def _compute_dashboard_stats(user_id: int) -> Dict:
+    now = datetime.utcnow()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    thirty_days_ago = now - timedelta(days=30)
+    sixty_days_ago = now - timedelta(days=60)
+    
+    # The three query groups are independent, so each runs on its own session
+    # and the round-trips overlap instead of adding up
+    (
+        (counts, provider_rows, region_rows),
+        (cost_totals, provider_cost_rows),
+        (health_records, recent_resources),
+    ) = await asyncio.gather(
+        _query_inventory(user_id, today_start),
+        _query_costs(user_id, thirty_days_ago, sixty_days_ago),
+        _query_activity(user_id),
+    )
+    
+    total_resources = counts.total
+    active_vms = counts.active_vms
+    total_storage = counts.storage
+    total_networks = counts.networks
+    
+    # Provider breakdown
+    provider_counts = {
+        provider: {'count': count, 'vms': vms, 'storage': storage}
+        for provider, count, vms, storage in provider_rows
+    }
+    
+    provider_breakdown = [
+        {
+            'provider': provider,
+            'count': data['count'],
+            'vms': data['vms'],
+            'storage': data['storage']
+        }
+        for provider, data in provider_counts.items()
+    ]
+    
+    # Cost calculation (last 30 days, and the 30 days before for the change label)
+    total_cost = cost_totals.current
+    total_cost_prev = cost_totals.previous
+    
+    # Cost by provider
+    cost_by_provider = dict(provider_cost_rows)
+    
+    cost_by_provider_list = [
+        {'provider': provider, 'cost': round(cost, 2)}
+        for provider, cost in cost_by_provider.items()
+    ]
+    
+    # Group into major categories (bucketed by the cost totals query)
+    compute_cost = cost_totals.compute
+    storage_cost = cost_totals.storage
+    other_cost = total_cost - compute_cost - storage_cost
+    
+    cost_by_service_list = [
+        {'service': 'Compute', 'cost': round(compute_cost, 2)},
+        {'service': 'Storage', 'cost': round(storage_cost, 2)},
+        {'service': 'Network & Other', 'cost': round(other_cost, 2)}
+    ]
+    
+    # Region distribution (top 10 regions)
+    region_distribution = [
+        {'region': region, 'count': count}
+        for region, count in region_rows
+    ]
+    
+    # Provider health
+    provider_health = [
+        {
+            'provider': h.provider.upper(),
+            'status': h.status,
+            'response_time_ms': h.response_time_ms,
+            'last_check': h.last_check_at.isoformat() if h.last_check_at else None,
+            'error_message': h.error_message
+        }
+        for h in health_records
+    ]
+    
+    # Recent activity (last 10 synced resources)
+    recent_activity = [
+        {
+            'resource_name': r.resource_name,
+            'provider': r.provider.upper(),
+            'type': r.resource_type,
+            'status': r.status,
+            'region': r.region,
+            'last_synced': r.last_synced_at.isoformat() if r.last_synced_at else None
+        }
+        for r in recent_resources
+    ]
+
+    # Calculate dynamic metrics for change labels
+    resources_today = counts.resources_today
+    storage_today = counts.storage_today
+    networks_today = counts.networks_today
+    
+    running_percent = (counts.running_vms / counts.vms * 100) if counts.vms else 0
+
+    # Cost Change calculation
+    cost_change_percent = 0
+    if total_cost_prev > 0:
+        cost_change_percent = ((total_cost - total_cost_prev) / total_cost_prev) * 100
+    
+    return {
+        'total_resources': total_resources,
+        'active_vms': active_vms,
+        'total_storage': total_storage,
+        'total_networks': total_networks,
+        'estimated_monthly_cost': round(total_cost, 2),
+        'provider_breakdown': provider_breakdown,
+        'cost_by_provider': cost_by_provider_list,
+        'cost_by_service': cost_by_service_list,
+        'region_distribution': region_distribution,
+        'provider_health': provider_health,
+        'recent_activity': recent_activity,
+        'last_updated': now.isoformat(),
+        'metrics': {
+            'resources_change': {
+                'value': resources_today,
+                'label': 'added today',
+                'type': 'increase' if resources_today > 0 else 'neutral',
+                'unit': ''
+            },
+            'vms_status': {
+                'value': round(running_percent, 1),
+                'label': 'running',
+                'type': 'increase' if running_percent > 80 else 'decrease' if running_percent < 20 else 'neutral',
+                'unit': '%'
+            },
+            'storage_change': {
+                'value': storage_today,
+                'label': 'added today',
+                'type': 'increase' if storage_today > 0 else 'neutral',
+                'unit': ''
+            },
+            'networks_change': {
+                'value': networks_today,
+                'label': 'created today',
+                'type': 'increase' if networks_today > 0 else 'neutral',
+                'unit': ''
+            },
+            'cost_change': {
+                'value': abs(round(cost_change_percent, 1)),
+                'label': 'vs last month',
+                'type': 'increase' if cost_change_percent > 0 else 'decrease' if cost_change_percent < 0 else 'neutral',
+                'unit': '%'
+            }
+        }
+    }
+
+
+async def _stats_etag(user_id: int) -> str:
+    """
+    Weak ETag for a user's dashboard stats
+    
+    Fingerprints the latest sync, cost record and health check timestamps
+    (index lookups), the version the cost roll-up sets in Redis when it
+    rewrites the user's totals, and the current day, since the "today" and
+    30-day windows move with the date.
+    """
+    fingerprint = select(
+        select(func.max(ResourceInventory.last_synced_at)).where(ResourceInventory.user_id == user_id).scalar_subquery(),
+        select(func.max(CostData.created_at)).where(CostData.user_id == user_id).scalar_subquery(),
+        select(func.max(ProviderHealth.last_check_at)).where(ProviderHealth.user_id == user_id).scalar_subquery(),
+    )
+    async with get_async_sessionmaker()() as db:
+        row = (await db.execute(fingerprint)).one()
+    cost_version = cache.get_json(cache.cost_rollup_version_key(user_id))
+    
+    digest = hashlib.md5(repr((user_id, datetime.utcnow().date(), tuple(row), cost_version)).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _store_dashboard_stats(user_id: int, stats: Dict, etag: str) -> None:
+    cache.set_json(
+        _stats_cache_key(user_id),
+        {'cached_at': time.time(), 'etag': etag, 'stats': stats},
+        STATS_CACHE_STALE_SECONDS
+    )
+
+
+async def _refresh_dashboard_stats(user_id: int) -> None:
+    """Recompute a user's stale dashboard stats and store them in the cache."""
+    if not cache.acquire_lock(f"{_stats_cache_key(user_id)}:refresh", STATS_CACHE_FRESH_SECONDS):
+        return
+    try:
+        # Fingerprint before computing so a change made meanwhile still
+        # invalidates the stored entry on the next request
+        etag = await _stats_etag(user_id)
+        _store_dashboard_stats(user_id, await _compute_dashboard_stats(user_id), etag)
+    except Exception as e:
+        logger.error(f"Error refreshing dashboard stats for user {user_id}: {e}")
+
 
 @router.get("/stats")
-def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_dashboard_stats(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
 ) -> Dict:
     """
     Get comprehensive dashboard statistics with real-time data
@@ -35,207 +353,47 @@ def get_dashboard_stats(
         - Cost by service
         - Region distribution
         - Provider health status
+    
+    Stats are cached per user in Redis: a fresh entry is returned as is, a
+    stale one is returned immediately while it is recomputed in the background.
+    Responses carry an ETag, and a client already holding the current version
+    gets a 304 without the stats being computed. A fresh entry is served
+    (or answered with 304) without touching the database.
     """
-    try:
-        # Get all resources from inventory
-        inventory = db.query(ResourceInventory).filter(
-            ResourceInventory.user_id == current_user.id
-        ).all()
-        
-        # Calculate basic counts
-        total_resources = len(inventory)
-        active_vms = len([r for r in inventory if r.resource_type == 'vm' and r.status in ['running', 'RUNNING']])
-        total_storage = len([r for r in inventory if r.resource_type == 'storage'])
-        total_networks = len([r for r in inventory if r.resource_type in ['vpc', 'network', 'resource_group', 'vnet']])
-        
-        # Provider breakdown
-        provider_counts = {}
-        for resource in inventory:
-            provider = resource.provider.upper()
-            if provider not in provider_counts:
-                provider_counts[provider] = {'count': 0, 'vms': 0, 'storage': 0}
-            provider_counts[provider]['count'] += 1
-            if resource.resource_type == 'vm':
-                provider_counts[provider]['vms'] += 1
-            elif resource.resource_type == 'storage':
-                provider_counts[provider]['storage'] += 1
-        
-        provider_breakdown = [
-            {
-                'provider': provider,
-                'count': data['count'],
-                'vms': data['vms'],
-                'storage': data['storage']
-            }
-            for provider, data in provider_counts.items()
-        ]
-        
-        # Cost calculation (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        cost_data = db.query(CostData).filter(
-            CostData.user_id == current_user.id,
-            CostData.period_start >= thirty_days_ago
-        ).all()
-        
-        # Calculate total cost
-        total_cost = sum(c.cost_amount for c in cost_data)
-        
-        # Cost by provider
-        cost_by_provider = {}
-        for cost in cost_data:
-            provider = cost.provider.upper()
-            if provider not in cost_by_provider:
-                cost_by_provider[provider] = 0
-            cost_by_provider[provider] += cost.cost_amount
-        
-        cost_by_provider_list = [
-            {'provider': provider, 'cost': round(cost, 2)}
-            for provider, cost in cost_by_provider.items()
-        ]
-        
-        # Cost by service
-        cost_by_service = {}
-        for cost in cost_data:
-            service = cost.service_name or 'Other'
-            if service not in cost_by_service:
-                cost_by_service[service] = 0
-            cost_by_service[service] += cost.cost_amount
-        
-        # Group into major categories
-        compute_services = ['EC2', 'Compute', 'Virtual Machines', 'Compute Engine']
-        storage_services = ['S3', 'Storage', 'Blob Storage', 'Cloud Storage']
-        
-        compute_cost = sum(cost for service, cost in cost_by_service.items() if any(s in service for s in compute_services))
-        storage_cost = sum(cost for service, cost in cost_by_service.items() if any(s in service for s in storage_services))
-        other_cost = total_cost - compute_cost - storage_cost
-        
-        cost_by_service_list = [
-            {'service': 'Compute', 'cost': round(compute_cost, 2)},
-            {'service': 'Storage', 'cost': round(storage_cost, 2)},
-            {'service': 'Network & Other', 'cost': round(other_cost, 2)}
-        ]
-        
-        # Region distribution
-        region_counts = {}
-        for resource in inventory:
-            region = resource.region or 'unknown'
-            region_counts[region] = region_counts.get(region, 0) + 1
-        
-        region_distribution = [
-            {'region': region, 'count': count}
-            for region, count in sorted(region_counts.items(), key=lambda x: x[1], reverse=True)
-        ][:10]  # Top 10 regions
-        
-        # Provider health
-        health_records = db.query(ProviderHealth).filter(
-            ProviderHealth.user_id == current_user.id
-        ).all()
-        
-        provider_health = [
-            {
-                'provider': h.provider.upper(),
-                'status': h.status,
-                'response_time_ms': h.response_time_ms,
-                'last_check': h.last_check_at.isoformat() if h.last_check_at else None,
-                'error_message': h.error_message
-            }
-            for h in health_records
-        ]
-        
-        # Recent activity (last 10 synced resources)
-        recent_resources = db.query(ResourceInventory).filter(
-            ResourceInventory.user_id == current_user.id
-        ).order_by(ResourceInventory.last_synced_at.desc()).limit(10).all()
-        
-        recent_activity = [
-            {
-                'resource_name': r.resource_name,
-                'provider': r.provider.upper(),
-                'type': r.resource_type,
-                'status': r.status,
-                'region': r.region,
-                'last_synced': r.last_synced_at.isoformat() if r.last_synced_at else None
-            }
-            for r in recent_resources
-        ]
-
-        # Calculate dynamic metrics for change labels
-        now = datetime.utcnow()
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        resources_today = [r for r in inventory if r.created_at >= today_start]
-        storage_today = [r for r in inventory if r.resource_type == 'storage' and r.created_at >= today_start]
-        networks_today = [r for r in inventory if r.resource_type in ['vpc', 'network', 'vnet'] and r.created_at >= today_start]
-        
-        vms = [r for r in inventory if r.resource_type == 'vm']
-        running_vms_count = len([vm for vm in vms if vm.status in ['running', 'RUNNING', 'active', 'ACTIVE']])
-        running_percent = (running_vms_count / len(vms) * 100) if vms else 0
-
-        # Cost Change calculation
-        sixty_days_ago = now - timedelta(days=60)
-        prev_cost_data = db.query(CostData).filter(
-            CostData.user_id == current_user.id,
-            CostData.period_start >= sixty_days_ago,
-            CostData.period_start < thirty_days_ago
-        ).all()
-        total_cost_prev = sum(c.cost_amount for c in prev_cost_data)
-        cost_change_percent = 0
-        if total_cost_prev > 0:
-            cost_change_percent = ((total_cost - total_cost_prev) / total_cost_prev) * 100
-        
-        return {
-            'total_resources': total_resources,
-            'active_vms': active_vms,
-            'total_storage': total_storage,
-            'total_networks': total_networks,
-            'estimated_monthly_cost': round(total_cost, 2),
-            'provider_breakdown': provider_breakdown,
-            'cost_by_provider': cost_by_provider_list,
-            'cost_by_service': cost_by_service_list,
-            'region_distribution': region_distribution,
-            'provider_health': provider_health,
-            'recent_activity': recent_activity,
-            'last_updated': now.isoformat(),
-            'metrics': {
-                'resources_change': {
-                    'value': len(resources_today),
-                    'label': 'added today',
-                    'type': 'increase' if len(resources_today) > 0 else 'neutral',
-                    'unit': ''
-                },
-                'vms_status': {
-                    'value': round(running_percent, 1),
-                    'label': 'running',
-                    'type': 'increase' if running_percent > 80 else 'decrease' if running_percent < 20 else 'neutral',
-                    'unit': '%'
-                },
-                'storage_change': {
-                    'value': len(storage_today),
-                    'label': 'added today',
-                    'type': 'increase' if len(storage_today) > 0 else 'neutral',
-                    'unit': ''
-                },
-                'networks_change': {
-                    'value': len(networks_today),
-                    'label': 'created today',
-                    'type': 'increase' if len(networks_today) > 0 else 'neutral',
-                    'unit': ''
-                },
-                'cost_change': {
-                    'value': abs(round(cost_change_percent, 1)),
-                    'label': 'vs last month',
-                    'type': 'increase' if cost_change_percent > 0 else 'decrease' if cost_change_percent < 0 else 'neutral',
-                    'unit': '%'
-                }
-            }
-        }
-        
-    except Exception as e:
-        logger.error(f"Error fetching dashboard stats: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching dashboard stats: {str(e)}")
+    user_id = current_user.id
+    client_etags = [tag.strip() for tag in request.headers.get('if-none-match', '').split(',')]
+    response.headers['Cache-Control'] = STATS_CACHE_CONTROL
+    
+    cached = cache.get_json(_stats_cache_key(user_id))
+    if (
+        isinstance(cached, dict) and 'stats' in cached and cached.get('etag')
+        and time.time() - cached.get('cached_at', 0) < STATS_CACHE_FRESH_SECONDS
+    ):
+        if cached['etag'] in client_etags:
+            return Response(status_code=304, headers={'ETag': cached['etag'], 'Cache-Control': STATS_CACHE_CONTROL})
+        response.headers['ETag'] = cached['etag']
+        return cached['stats']
+    
+    etag = await _stats_etag(user_id)
+    if etag in client_etags:
+        return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': STATS_CACHE_CONTROL})
+    
+    if isinstance(cached, dict) and 'stats' in cached:
+        cached_etag = cached.get('etag')
+        if cached_etag != etag or time.time() - cached.get('cached_at', 0) >= STATS_CACHE_FRESH_SECONDS:
+            background_tasks.add_task(_refresh_dashboard_stats, user_id)
+        # Tag the body with the version it was computed from, which may be older
+        if cached_etag:
+            response.headers['ETag'] = cached_etag
+        return cached['stats']
+    
+    stats = await _compute_dashboard_stats(user_id)
+    _store_dashboard_stats(user_id, stats, etag)
+    response.headers['ETag'] = etag
+    return stats
 
 
-@router.post("/sync/trigger")
+@router.post("/sync/trigger", status_code=202)
 def trigger_manual_sync(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -246,13 +404,22 @@ def trigger_manual_sync(
     from app.tasks.sync_tasks import sync_user_resources
     
     try:
-        # Trigger async sync task
-        sync_user_resources.delay(current_user.id)
+        # Enqueue only: no broker retries and no result tracking, so a slow or
+        # unavailable broker fails fast instead of holding the request.
+        # A sync that has not started within 5 minutes is dropped.
+        result = sync_user_resources.apply_async(
+            args=[current_user.id],
+            retry=False,
+            ignore_result=True,
+            expires=300
+        )
+        cache.delete(_stats_cache_key(current_user.id))
         
         return {
             'status': 'success',
             'message': 'Resource sync triggered successfully',
-            'user_id': current_user.id
+            'user_id': current_user.id,
+            'task_id': result.id
         }
     except Exception as e:
         logger.error(f"Error triggering sync: {e}")
@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import Any, List, Optional
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 
 from app.api.deps import get_current_user
 from app.db.base import get_db
@@ -16,15 +17,23 @@ router = APIRouter()
 FINAL_STATUSES = {"active", "failed", "destroyed", "inactive", "stopped"}
 
 
-def _extract_logs(terraform_output: Any) -> str:
+def _count_lines(text: str) -> int:
+    """Same result as len(text.splitlines()) for newline-separated text, without building the list."""
+    if not text:
+        return 0
+    return text.count("\n") + (0 if text.endswith("\n") else 1)
+
+
+def _extract_logs(terraform_output: Any) -> Tuple[str, int]:
+    """Return the deployment log text and its line count."""
     if not isinstance(terraform_output, dict):
-        return ""
+        return "", 0
 
     logs = terraform_output.get("logs")
     if isinstance(logs, list):
-        return "\n".join(str(line) for line in logs)
+        return "\n".join(str(line) for line in logs), len(logs)
     if isinstance(logs, str):
-        return logs
+        return logs, _count_lines(logs)
 
     # Fallback for failed queue/decryption cases where explicit logs are missing.
     message_parts: List[str] = []
@@ -34,7 +43,17 @@ def _extract_logs(terraform_output: Any) -> str:
         message_parts.append(str(error))
     if detail:
         message_parts.append(str(detail))
-    return "\n".join(message_parts)
+    message = "\n".join(message_parts)
+    return message, _count_lines(message)
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso_datetime(value: str) -> Optional[datetime]:
+    # Python 3.11+ (all our images) parses the "Z" suffix natively
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
 
 
 def _parse_completed_at(terraform_output: Any) -> Optional[datetime]:
@@ -49,11 +68,7 @@ def _parse_completed_at(terraform_output: Any) -> Optional[datetime]:
         return value
 
     if isinstance(value, str):
-        candidate = value.replace("Z", "+00:00")
-        try:
-            return datetime.fromisoformat(candidate)
-        except ValueError:
-            return None
+        return _parse_iso_datetime(value)
 
     return None
 
@@ -67,21 +82,38 @@ def _parse_duration(terraform_output: Any) -> Optional[int]:
         return None
 
     try:
-        parsed = int(value)
-    except (TypeError, ValueError):
+        # Durations may be stored as floats or numeric strings ("12.5")
+        parsed = int(float(value))
+    except (TypeError, ValueError, OverflowError):
         return None
     return parsed if parsed >= 0 else None
 
 
-def _serialize_deployment(resource: Resource) -> DeploymentResponse:
-    logs = _extract_logs(resource.terraform_output)
-    completed_at = _parse_completed_at(resource.terraform_output)
-    duration = _parse_duration(resource.terraform_output)
+def _summarize_logs(terraform_output: Any) -> Tuple[bool, int]:
+    """Return whether there are logs and their line count, without joining list logs."""
+    logs = terraform_output.get("logs") if isinstance(terraform_output, dict) else None
+    if isinstance(logs, list):
+        return any(str(line).strip() for line in logs), len(logs)
+    text, line_count = _extract_logs(terraform_output)
+    return bool(text.strip()), line_count
+
+
+# The parts of terraform_output the list view reads; the rest of the document
+# (provider outputs, state details) stays in the database
+_LIST_OUTPUT_KEYS = ("logs", "error", "detail", "completed_at", "duration_seconds")
+
+
+def _serialize_deployment(resource: Any, terraform_output: Any) -> DeploymentResponse:
+    has_logs, log_line_count = _summarize_logs(terraform_output)
+    completed_at = _parse_completed_at(terraform_output)
+    duration = _parse_duration(terraform_output)
 
     if completed_at is None and (resource.status or "").lower() in FINAL_STATUSES and duration is not None:
         completed_at = resource.created_at
 
-    return DeploymentResponse(
+    # Built once per listed row from loaded columns and the parsers above, so
+    # skip validation here; FastAPI checks the response model on the way out
+    return DeploymentResponse.model_construct(
         id=resource.id,
         resource_id=resource.id,
         resource_name=resource.name,
@@ -92,8 +124,8 @@ def _serialize_deployment(resource: Resource) -> DeploymentResponse:
         started_at=resource.created_at,
         completed_at=completed_at,
         duration_seconds=duration,
-        has_logs=bool(logs.strip()),
-        log_line_count=len(logs.splitlines()) if logs else 0,
+        has_logs=has_logs,
+        log_line_count=log_line_count,
     )
 
 
@@ -102,14 +134,26 @@ def list_deployments(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    resources = (
-        db.query(Resource)
+    rows = (
+        db.query(
+            Resource.id,
+            Resource.name,
+            Resource.provider,
+            Resource.type,
+            Resource.status,
+            Resource.project_id,
+            Resource.created_at,
+            *(Resource.terraform_output[key].label(key) for key in _LIST_OUTPUT_KEYS),
+        )
         .join(Project)
         .filter(Project.user_id == current_user.id)
         .order_by(Resource.created_at.desc(), Resource.id.desc())
         .all()
     )
-    return [_serialize_deployment(resource) for resource in resources]
+    return [
+        _serialize_deployment(row, {key: row._mapping[key] for key in _LIST_OUTPUT_KEYS})
+        for row in rows
+    ]
 
 
 @router.get("/{deployment_id}", response_model=DeploymentDetailResponse)
@@ -121,13 +165,14 @@ def read_deployment(
     resource = (
         db.query(Resource)
         .join(Project)
+        .options(contains_eager(Resource.project))
         .filter(Resource.id == deployment_id, Project.user_id == current_user.id)
         .first()
     )
     if not resource:
         raise HTTPException(status_code=404, detail="Deployment not found")
 
-    logs = _extract_logs(resource.terraform_output)
+    logs, log_line_count = _extract_logs(resource.terraform_output)
     completed_at = _parse_completed_at(resource.terraform_output)
     duration = _parse_duration(resource.terraform_output)
 
@@ -143,7 +188,7 @@ def read_deployment(
         completed_at=completed_at,
         duration_seconds=duration,
         has_logs=bool(logs.strip()),
-        log_line_count=len(logs.splitlines()) if logs else 0,
+        log_line_count=log_line_count,
         configuration=resource.configuration or {},
         terraform_output=resource.terraform_output or {},
         logs=logs,
@@ -159,6 +204,7 @@ def delete_deployment(
     resource = (
         db.query(Resource)
         .join(Project)
+        .options(contains_eager(Resource.project))
         .filter(Resource.id == deployment_id, Project.user_id == current_user.id)
         .first()
     )
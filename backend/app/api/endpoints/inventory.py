@@ -3,6 +3,8 @@ Resource Inventory API Endpoints
 Provides access to cached cloud resources (VMs, Storage, Networks)
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import false, func
 from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.models.user import User
@@ -18,6 +20,72 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Columns serialized by the list endpoints. Selecting them directly returns
+# plain rows instead of session-tracked ResourceInventory instances. The
+# endpoints return ORJSONResponse themselves, so orjson encodes the datetimes
+# (same ISO format as isoformat()) and jsonable_encoder is skipped.
+_LIST_COLUMNS = (
+    ResourceInventory.id,
+    ResourceInventory.resource_id,
+    ResourceInventory.resource_name,
+    func.upper(ResourceInventory.provider).label('provider_display'),
+    ResourceInventory.resource_type,
+    ResourceInventory.region,
+    ResourceInventory.status,
+    ResourceInventory.created_at,
+    ResourceInventory.last_synced_at,
+    ResourceInventory.resource_metadata,
+    ResourceInventory.tags,
+)
+_VM_LIST_COLUMNS = _LIST_COLUMNS + (
+    ResourceInventory.instance_type,
+    ResourceInventory.public_ip,
+    ResourceInventory.private_ip,
+    ResourceInventory.cost_per_hour,
+)
+
+
+def _paginate(query, skip: int, limit: int):
+    """
+    Fetch one page of inventory rows together with the total match count.
+    
+    The total is a COUNT(*) OVER () window column on the page query itself, so
+    listing takes a single statement instead of a separate COUNT query.
+    """
+    rows = query.add_columns(func.count().over().label('total')).order_by(
+        ResourceInventory.last_synced_at.desc(), ResourceInventory.id.desc()
+    ).offset(skip).limit(limit).all()
+    
+    if rows:
+        return rows[0].total, rows
+    # Past the last page the window has no rows to report on
+    return (query.count() if skip else 0), []
+
+
+def _filter_by_tag(query, tag: Optional[str]):
+    """
+    Narrow an inventory query to resources carrying a tag.
+    
+    'key=value' matches that exact tag and a bare 'key' any value. On
+    PostgreSQL both are JSONB operators (@> and ?) served by the GIN index on
+    tags; SQLite stores tags as plain JSON and is matched with json_extract.
+    """
+    if not tag:
+        return query
+    key, sep, value = tag.partition('=')
+    if query.session.get_bind().dialect.name == 'sqlite':
+        if '"' in key:
+            # SQLite JSON paths cannot quote a double quote
+            return query.filter(false())
+        path = f'$."{key}"'
+        if sep:
+            return query.filter(func.json_extract(ResourceInventory.tags, path) == value)
+        return query.filter(func.json_type(ResourceInventory.tags, path).isnot(None))
+    if sep:
+        return query.filter(ResourceInventory.tags.contains({key: value}))
+    return query.filter(ResourceInventory.tags.has_key(key))
+
+
 class NetworkCreate(BaseModel):
     name: str
     provider: str
@@ -33,39 +101,34 @@ def create_network_resource(
     """
     Create a new network resource
     """
-    try:
-        resource_id = f"vpc-{uuid.uuid4().hex[:8]}"
-        
-        new_network = ResourceInventory(
-            user_id=current_user.id,
-            provider=network.provider.lower(),
-            resource_type='network',
-            resource_id=resource_id,
-            resource_name=network.name,
-            region=network.region,
-            status='active',
-            resource_metadata=network.metadata,
-            created_at=datetime.utcnow(),
-            last_synced_at=datetime.utcnow()
-        )
-        db.add(new_network)
-        db.commit()
-        db.refresh(new_network)
-        
-        return {
-            'id': new_network.id,
-            'resource_id': new_network.resource_id,
-            'name': new_network.resource_name,
-            'provider': new_network.provider.upper(),
-            'type': new_network.resource_type,
-            'region': new_network.region,
-            'status': new_network.status,
-            'metadata': new_network.resource_metadata
-        }
-        
-    except Exception as e:
-        logger.error(f"Error creating network resource: {e}")
-        raise HTTPException(status_code=500, detail=f"Error creating network: {str(e)}")
+    resource_id = f"vpc-{uuid.uuid4().hex[:8]}"
+    
+    new_network = ResourceInventory(
+        user_id=current_user.id,
+        provider=network.provider.lower(),
+        resource_type='network',
+        resource_id=resource_id,
+        resource_name=network.name,
+        region=network.region,
+        status='active',
+        resource_metadata=network.metadata,
+        created_at=datetime.utcnow(),
+        last_synced_at=datetime.utcnow()
+    )
+    db.add(new_network)
+    db.commit()
+    db.refresh(new_network)
+    
+    return {
+        'id': new_network.id,
+        'resource_id': new_network.resource_id,
+        'name': new_network.resource_name,
+        'provider': new_network.provider.upper(),
+        'type': new_network.resource_type,
+        'region': new_network.region,
+        'status': new_network.status,
+        'metadata': new_network.resource_metadata
+    }
 
 
 @router.get("/vms")
@@ -73,6 +136,7 @@ def get_virtual_machines(
     provider: Optional[str] = Query(None, description="Filter by provider (aws, azure, gcp)"),
     region: Optional[str] = Query(None, description="Filter by region"),
     status: Optional[str] = Query(None, description="Filter by status"),
+    tag: Optional[str] = Query(None, description="Filter by tag: key or key=value"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_user),
@@ -86,60 +150,54 @@ def get_virtual_machines(
     - instance_type, public_ip, private_ip
     - cost_per_hour, metadata, tags
     """
-    try:
-        query = db.query(ResourceInventory).filter(
-            ResourceInventory.user_id == current_user.id,
-            ResourceInventory.resource_type == 'vm'
-        )
-        
-        # Apply filters
-        if provider:
-            query = query.filter(ResourceInventory.provider == provider.lower())
-        if region:
-            query = query.filter(ResourceInventory.region == region)
-        if status:
-            query = query.filter(ResourceInventory.status == status.lower())
-        
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination
-        vms = query.order_by(ResourceInventory.last_synced_at.desc()).offset(skip).limit(limit).all()
-        
-        return {
-            'total': total,
-            'skip': skip,
-            'limit': limit,
-            'items': [
-                {
-                    'id': vm.id,
-                    'resource_id': vm.resource_id,
-                    'name': vm.resource_name,
-                    'provider': vm.provider.upper(),
-                    'region': vm.region,
-                    'status': vm.status,
-                    'instance_type': vm.instance_type,
-                    'public_ip': vm.public_ip,
-                    'private_ip': vm.private_ip,
-                    'cost_per_hour': vm.cost_per_hour,
-                    'created_at': vm.created_at.isoformat() if vm.created_at else None,
-                    'last_synced_at': vm.last_synced_at.isoformat() if vm.last_synced_at else None,
-                    'metadata': vm.resource_metadata,
-                    'tags': vm.tags
-                }
-                for vm in vms
-            ]
-        }
-        
-    except Exception as e:
-        logger.error(f"Error fetching VMs: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching VMs: {str(e)}")
+    query = db.query(*_VM_LIST_COLUMNS).filter(
+        ResourceInventory.user_id == current_user.id,
+        ResourceInventory.resource_type == 'vm'
+    )
+    
+    # Apply filters
+    if provider:
+        query = query.filter(ResourceInventory.provider == provider.lower())
+    if region:
+        query = query.filter(ResourceInventory.region == region)
+    if status:
+        query = query.filter(ResourceInventory.status == status.lower())
+    query = _filter_by_tag(query, tag)
+    
+    # Page and total count in one query
+    total, vms = _paginate(query, skip, limit)
+    
+    return ORJSONResponse({
+        'total': total,
+        'skip': skip,
+        'limit': limit,
+        'items': [
+            {
+                'id': vm.id,
+                'resource_id': vm.resource_id,
+                'name': vm.resource_name,
+                'provider': vm.provider_display,
+                'region': vm.region,
+                'status': vm.status,
+                'instance_type': vm.instance_type,
+                'public_ip': vm.public_ip,
+                'private_ip': vm.private_ip,
+                'cost_per_hour': vm.cost_per_hour,
+                'created_at': vm.created_at,
+                'last_synced_at': vm.last_synced_at,
+                'metadata': vm.resource_metadata,
+                'tags': vm.tags
+            }
+            for vm in vms
+        ]
+    })
 
 
 @router.get("/storage")
 def get_storage_resources(
     provider: Optional[str] = Query(None, description="Filter by provider"),
     region: Optional[str] = Query(None, description="Filter by region"),
+    tag: Optional[str] = Query(None, description="Filter by tag: key or key=value"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_user),
@@ -148,49 +206,45 @@ def get_storage_resources(
     """
     Get all storage resources (S3 buckets, Blob containers, Cloud Storage buckets)
     """
-    try:
-        query = db.query(ResourceInventory).filter(
-            ResourceInventory.user_id == current_user.id,
-            ResourceInventory.resource_type == 'storage'
-        )
-        
-        if provider:
-            query = query.filter(ResourceInventory.provider == provider.lower())
-        if region:
-            query = query.filter(ResourceInventory.region == region)
-        
-        total = query.count()
-        storage = query.order_by(ResourceInventory.last_synced_at.desc()).offset(skip).limit(limit).all()
-        
-        return {
-            'total': total,
-            'skip': skip,
-            'limit': limit,
-            'items': [
-                {
-                    'id': s.id,
-                    'resource_id': s.resource_id,
-                    'name': s.resource_name,
-                    'provider': s.provider.upper(),
-                    'region': s.region,
-                    'status': s.status,
-                    'created_at': s.created_at.isoformat() if s.created_at else None,
-                    'last_synced_at': s.last_synced_at.isoformat() if s.last_synced_at else None,
-                    'metadata': s.resource_metadata,
-                    'tags': s.tags
-                }
-                for s in storage
-            ]
-        }
-        
-    except Exception as e:
-        logger.error(f"Error fetching storage resources: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching storage: {str(e)}")
+    query = db.query(*_LIST_COLUMNS).filter(
+        ResourceInventory.user_id == current_user.id,
+        ResourceInventory.resource_type == 'storage'
+    )
+    
+    if provider:
+        query = query.filter(ResourceInventory.provider == provider.lower())
+    if region:
+        query = query.filter(ResourceInventory.region == region)
+    query = _filter_by_tag(query, tag)
+    
+    total, storage = _paginate(query, skip, limit)
+    
+    return ORJSONResponse({
+        'total': total,
+        'skip': skip,
+        'limit': limit,
+        'items': [
+            {
+                'id': s.id,
+                'resource_id': s.resource_id,
+                'name': s.resource_name,
+                'provider': s.provider_display,
+                'region': s.region,
+                'status': s.status,
+                'created_at': s.created_at,
+                'last_synced_at': s.last_synced_at,
+                'metadata': s.resource_metadata,
+                'tags': s.tags
+            }
+            for s in storage
+        ]
+    })
 
 
 @router.get("/networks")
 def get_network_resources(
     provider: Optional[str] = Query(None, description="Filter by provider"),
+    tag: Optional[str] = Query(None, description="Filter by tag: key or key=value"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(get_current_user),
@@ -199,43 +253,38 @@ def get_network_resources(
     """
     Get all network resources (VPCs, VNets, Networks)
     """
-    try:
-        query = db.query(ResourceInventory).filter(
-            ResourceInventory.user_id == current_user.id,
-            ResourceInventory.resource_type.in_(['vpc', 'network', 'resource_group'])
-        )
-        
-        if provider:
-            query = query.filter(ResourceInventory.provider == provider.lower())
-        
-        total = query.count()
-        networks = query.order_by(ResourceInventory.last_synced_at.desc()).offset(skip).limit(limit).all()
-        
-        return {
-            'total': total,
-            'skip': skip,
-            'limit': limit,
-            'items': [
-                {
-                    'id': n.id,
-                    'resource_id': n.resource_id,
-                    'name': n.resource_name,
-                    'provider': n.provider.upper(),
-                    'type': n.resource_type,
-                    'region': n.region,
-                    'status': n.status,
-                    'created_at': n.created_at.isoformat() if n.created_at else None,
-                    'last_synced_at': n.last_synced_at.isoformat() if n.last_synced_at else None,
-                    'metadata': n.resource_metadata,
-                    'tags': n.tags
-                }
-                for n in networks
-            ]
-        }
-        
-    except Exception as e:
-        logger.error(f"Error fetching network resources: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching networks: {str(e)}")
+    query = db.query(*_LIST_COLUMNS).filter(
+        ResourceInventory.user_id == current_user.id,
+        ResourceInventory.resource_type.in_(['vpc', 'network', 'resource_group'])
+    )
+    
+    if provider:
+        query = query.filter(ResourceInventory.provider == provider.lower())
+    query = _filter_by_tag(query, tag)
+    
+    total, networks = _paginate(query, skip, limit)
+    
+    return ORJSONResponse({
+        'total': total,
+        'skip': skip,
+        'limit': limit,
+        'items': [
+            {
+                'id': n.id,
+                'resource_id': n.resource_id,
+                'name': n.resource_name,
+                'provider': n.provider_display,
+                'type': n.resource_type,
+                'region': n.region,
+                'status': n.status,
+                'created_at': n.created_at,
+                'last_synced_at': n.last_synced_at,
+                'metadata': n.resource_metadata,
+                'tags': n.tags
+            }
+            for n in networks
+        ]
+    })
 
 
 @router.get("/{resource_id}")
@@ -247,35 +296,28 @@ def get_resource_detail(
     """
     Get detailed information about a specific resource
     """
-    try:
-        resource = db.query(ResourceInventory).filter(
-            ResourceInventory.id == resource_id,
-            ResourceInventory.user_id == current_user.id
-        ).first()
-        
-        if not resource:
-            raise HTTPException(status_code=404, detail="Resource not found")
-        
-        return {
-            'id': resource.id,
-            'resource_id': resource.resource_id,
-            'name': resource.resource_name,
-            'provider': resource.provider.upper(),
-            'type': resource.resource_type,
-            'region': resource.region,
-            'status': resource.status,
-            'instance_type': resource.instance_type,
-            'public_ip': resource.public_ip,
-            'private_ip': resource.private_ip,
-            'cost_per_hour': resource.cost_per_hour,
-            'created_at': resource.created_at.isoformat() if resource.created_at else None,
-            'last_synced_at': resource.last_synced_at.isoformat() if resource.last_synced_at else None,
-            'metadata': resource.resource_metadata,
-            'tags': resource.tags
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error fetching resource detail: {e}")
-        raise HTTPException(status_code=500, detail=f"Error fetching resource: {str(e)}")
+    resource = db.query(ResourceInventory).filter(
+        ResourceInventory.id == resource_id,
+        ResourceInventory.user_id == current_user.id
+    ).first()
+    
+    if not resource:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    
+    return {
+        'id': resource.id,
+        'resource_id': resource.resource_id,
+        'name': resource.resource_name,
+        'provider': resource.provider.upper(),
+        'type': resource.resource_type,
+        'region': resource.region,
+        'status': resource.status,
+        'instance_type': resource.instance_type,
+        'public_ip': resource.public_ip,
+        'private_ip': resource.private_ip,
+        'cost_per_hour': resource.cost_per_hour,
+        'created_at': resource.created_at.isoformat() if resource.created_at else None,
+        'last_synced_at': resource.last_synced_at.isoformat() if resource.last_synced_at else None,
+        'metadata': resource.resource_metadata,
+        'tags': resource.tags
+    }
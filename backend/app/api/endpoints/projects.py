@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
@@ -21,27 +23,41 @@ from app.services.subscription import enforce_project_limit
 router = APIRouter()
 
 
-def _serialize_project(project: Project, include_resources: bool = False) -> ProjectResponse | ProjectDetailResponse:
-    resources = sorted(
-        list(project.resources or []),
-        key=lambda item: ((item.created_at or datetime.min), item.id or 0),
-        reverse=True,
-    )
+def _serialize_project(
+    project: Project,
+    include_resources: bool = False,
+    resource_count: Optional[int] = None,
+    last_resource_at: Optional[datetime] = None,
+) -> ProjectResponse | ProjectDetailResponse:
+    """Build the project response.
+
+    The list view passes resource_count and last_resource_at aggregated in
+    its query, so project.resources is not loaded for it.
+    """
     now = project.created_at or datetime.utcnow()
-    last_updated = max((r.created_at for r in resources if r.created_at), default=now)
+    resources = []
+    if resource_count is None:
+        resources = sorted(
+            list(project.resources or []),
+            key=lambda item: ((item.created_at or datetime.min), item.id or 0),
+            reverse=True,
+        )
+        resource_count = len(resources)
+        last_resource_at = max((r.created_at for r in resources if r.created_at), default=None)
 
     base_payload = {
         "id": project.id,
         "name": project.name,
         "description": project.description or f"Workspace for {project.name}",
-        "resource_count": len(resources),
+        "resource_count": resource_count,
         "team_members": 1,
         "created_at": now,
-        "last_updated": last_updated,
+        "last_updated": last_resource_at or now,
     }
 
     if not include_resources:
-        return ProjectResponse(**base_payload)
+        # Values come straight from the database, so skip re-validation
+        return ProjectResponse.model_construct(**base_payload)
 
     return ProjectDetailResponse(
         **base_payload,
@@ -65,14 +81,25 @@ def list_projects(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    projects = (
-        db.query(Project)
+    # Resource counts and the latest resource timestamp are aggregated in the
+    # same query instead of lazy-loading every project's resources.
+    rows = (
+        db.query(
+            Project,
+            func.count(Resource.id).label("resource_count"),
+            func.max(Resource.created_at).label("last_resource_at"),
+        )
+        .outerjoin(Resource, Resource.project_id == Project.id)
         .filter(Project.user_id == current_user.id)
+        .group_by(Project.id)
         .order_by(Project.created_at.desc(), Project.id.desc())
         .all()
     )
 
-    return [_serialize_project(project) for project in projects]
+    return [
+        _serialize_project(project, resource_count=resource_count, last_resource_at=last_resource_at)
+        for project, resource_count, last_resource_at in rows
+    ]
 
 
 @router.post("/", response_model=ProjectResponse)
@@ -83,21 +110,17 @@ def create_project(
 ):
     enforce_project_limit(db, current_user)
 
-    existing = (
-        db.query(Project)
-        .filter(Project.user_id == current_user.id, Project.name == project_in.name)
-        .first()
-    )
-    if existing:
-        raise HTTPException(status_code=400, detail="Project with this name already exists")
-
     project = Project(
         name=project_in.name,
         description=project_in.description,
         user_id=current_user.id,
     )
     db.add(project)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Project with this name already exists")
     db.refresh(project)
 
     return _serialize_project(project)
@@ -142,25 +165,16 @@ def update_project(
             raise HTTPException(status_code=400, detail="Project name must be at least 2 characters.")
         next_name = trimmed_name
 
-    duplicate = (
-        db.query(Project)
-        .filter(
-            Project.user_id == current_user.id,
-            Project.name == next_name,
-            Project.id != project.id,
-        )
-        .first()
-    )
-    if duplicate:
-        raise HTTPException(status_code=400, detail="Project with this name already exists")
-
     if project_in.name is not None:
         project.name = next_name
     if project_in.description is not None:
         project.description = project_in.description.strip() or None
 
-    db.add(project)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Project with this name already exists")
     db.refresh(project)
     return _serialize_project(project)
 
@@ -179,24 +193,18 @@ def delete_project(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    resources: List[Resource] = (
-        db.query(Resource)
-        .filter(Resource.project_id == project.id)
-        .order_by(Resource.id.desc())
-        .all()
+    # Delete the project's rows with set-based statements; nothing needs to be
+    # loaded into the session just to be removed again.
+    project_resource_ids = select(Resource.id).where(Resource.project_id == project.id)
+    db.query(TerraformState).filter(TerraformState.resource_id.in_(project_resource_ids)).delete(
+        synchronize_session=False
     )
-    resource_ids = [resource.id for resource in resources]
-
-    if resource_ids:
-        db.query(TerraformState).filter(TerraformState.resource_id.in_(resource_ids)).delete(
-            synchronize_session=False
-        )
-        for resource in resources:
-            db.delete(resource)
-
-    db.delete(project)
+    deleted_resources = (
+        db.query(Resource).filter(Resource.project_id == project.id).delete(synchronize_session=False)
+    )
+    db.query(Project).filter(Project.id == project.id).delete(synchronize_session=False)
     db.commit()
     return {
         "message": "Project deleted successfully",
-        "deleted_resources": len(resource_ids),
+        "deleted_resources": deleted_resources,
     }
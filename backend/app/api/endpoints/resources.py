@@ -1,24 +1,30 @@
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, Iterator, List, Literal, Optional, Set, Tuple, Union
 import logging
 import json
+import os
+import orjson
 import re
 
-import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
-from app.db.base import get_db
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, raiseload
+from app.db.base import SessionLocal, get_async_db, get_db
 from app.models.resource import Resource, Project
 from app.models.credential import CloudCredential
 from app.models.user import User
 from app.models.resource_inventory import ResourceInventory
 from app.schemas.resource import ResourceCreate, ResourceResponse
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, invalidate_resource_stats, resource_stats_cache_key
 from app.worker import provision_resource_task
+from app.core import cache
 from app.core.security import decrypt_data
 
+from app.services import aws_clients
 from app.services.cloud_sync import CloudSyncService
 from app.services.subscription import enforce_project_limit
 
@@ -182,6 +188,311 @@ def _extract_gcp_project_id(credential_data: Dict[str, object], service_account_
     return None
 
 
+# Provider-specific Terraform variable translation, one builder per
+# (provider, type). Each takes a copy of the resource configuration and
+# returns it with defaults filled in and values normalised.
+
+def _aws_vm_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("instance_name", resource.name)
+    tf_vars.setdefault("instance_type", "t3.micro")
+    region = tf_vars.get("region", "us-east-1")
+    tf_vars.setdefault("ami", AWS_DEFAULT_AMI_BY_REGION.get(region, AWS_DEFAULT_AMI_BY_REGION["us-east-1"]))
+
+    subnet_id = str(tf_vars.get("subnet_id", "")).strip()
+    if subnet_id:
+        tf_vars["subnet_id"] = subnet_id
+    else:
+        tf_vars.pop("subnet_id", None)
+
+    key_name = str(tf_vars.get("key_name", "")).strip()
+    if key_name:
+        tf_vars["key_name"] = key_name
+    else:
+        tf_vars.pop("key_name", None)
+
+    if "vpc_security_group_ids" not in tf_vars and "security_groups" in tf_vars:
+        security_group_ids = _as_string_list(tf_vars.pop("security_groups"))
+        if security_group_ids:
+            tf_vars["vpc_security_group_ids"] = security_group_ids
+
+    if isinstance(tf_vars.get("vpc_security_group_ids"), str):
+        tf_vars["vpc_security_group_ids"] = _as_string_list(tf_vars["vpc_security_group_ids"])
+    return tf_vars
+
+
+def _aws_sqs_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("region", "us-east-1")
+    fifo_queue = _as_bool(tf_vars.get("fifo_queue"), False)
+    queue_name_input = _clean_string(tf_vars.get("queue_name"), resource.name)
+    tf_vars["queue_name"] = _sanitize_aws_sqs_queue_name(queue_name_input, fifo_queue=fifo_queue)
+    tf_vars["fifo_queue"] = fifo_queue
+    tf_vars["content_based_deduplication"] = _as_bool(
+        tf_vars.get("content_based_deduplication"),
+        fifo_queue,
+    )
+    tf_vars["visibility_timeout_seconds"] = _as_int(tf_vars.get("visibility_timeout_seconds"), 30)
+    tf_vars["message_retention_seconds"] = _as_int(tf_vars.get("message_retention_seconds"), 345600)
+    tf_vars["delay_seconds"] = _as_int(tf_vars.get("delay_seconds"), 0)
+    tf_vars["max_message_size"] = _as_int(tf_vars.get("max_message_size"), 262144)
+    tf_vars["receive_wait_time_seconds"] = _as_int(tf_vars.get("receive_wait_time_seconds"), 0)
+    tf_vars["enable_dlq"] = _as_bool(tf_vars.get("enable_dlq"), False)
+    dlq_name_input = _clean_string(tf_vars.get("dlq_name"), f"{resource.name}-dlq")
+    tf_vars["dlq_name"] = _sanitize_aws_sqs_queue_name(dlq_name_input, fifo_queue=fifo_queue)
+    tf_vars["redrive_max_receive_count"] = _as_int(tf_vars.get("redrive_max_receive_count"), 5)
+    return tf_vars
+
+
+def _aws_sns_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("region", "us-east-1")
+    fifo_topic = _as_bool(tf_vars.get("fifo_topic"), False)
+    topic_name_input = _clean_string(tf_vars.get("topic_name"), resource.name)
+    tf_vars["topic_name"] = _sanitize_aws_sns_topic_name(topic_name_input, fifo_topic=fifo_topic)
+    tf_vars["fifo_topic"] = fifo_topic
+    tf_vars["content_based_deduplication"] = _as_bool(
+        tf_vars.get("content_based_deduplication"),
+        fifo_topic,
+    )
+    tf_vars["display_name"] = _clean_string(tf_vars.get("display_name"), resource.name)
+    tf_vars["delivery_policy"] = _clean_string(tf_vars.get("delivery_policy"))
+    return tf_vars
+
+
+def _aws_network_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("region", "us-east-1")
+    tf_vars.setdefault("network_name", resource.name)
+    # Handle both 'cidr' and 'cidr_block' for compatibility
+    if "cidr" in tf_vars and "cidr_block" not in tf_vars:
+        tf_vars["cidr_block"] = tf_vars.pop("cidr")
+    tf_vars.setdefault("cidr_block", "10.0.0.0/16")
+    tf_vars["enable_dns_support"] = _as_bool(tf_vars.get("enable_dns_support"), True)
+    tf_vars["enable_dns_hostnames"] = _as_bool(tf_vars.get("enable_dns_hostnames"), True)
+    return tf_vars
+
+
+def _aws_faas_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("region", "us-east-1")
+    aws_function_name = _clean_string(tf_vars.get("function_name"), resource.name)
+    tf_vars["function_name"] = _sanitize_aws_lambda_name(aws_function_name)
+    tf_vars.setdefault("runtime", "python3.11")
+    tf_vars.setdefault("handler", "index.lambda_handler")
+    tf_vars.setdefault("timeout", 30)
+    tf_vars.setdefault("memory_size", 128)
+    tf_vars.setdefault("description", f"Cloud Simplify managed Lambda for {resource.name}")
+    trigger_type = _normalize_function_trigger("aws", tf_vars.get("trigger_type"))
+    trigger_source = _clean_string(tf_vars.get("trigger_source"))
+    schedule_expression = _clean_string(
+        tf_vars.get("trigger_schedule_expression") or tf_vars.get("schedule_expression")
+    )
+    route_path = _clean_string(tf_vars.get("route_path"), "/")
+    if not route_path.startswith("/"):
+        route_path = f"/{route_path}"
+    action_destination_url = _clean_string(tf_vars.get("action_destination_url"))
+    on_success_destination = _clean_string(tf_vars.get("on_success_destination"))
+    on_failure_destination = _clean_string(tf_vars.get("on_failure_destination"))
+    website_enabled = _as_bool(tf_vars.get("website_enabled"), trigger_type == "http")
+    allowed_origins = _as_string_list(tf_vars.get("allowed_origins")) or ["*"]
+
+    tf_vars["trigger_type"] = trigger_type
+    tf_vars["website_enabled"] = website_enabled
+    tf_vars["route_path"] = route_path
+    tf_vars["allowed_origins"] = allowed_origins
+    tf_vars["action_destination_url"] = action_destination_url
+    tf_vars["on_success_destination_arn"] = on_success_destination
+    tf_vars["on_failure_destination_arn"] = on_failure_destination
+    tf_vars["schedule_expression"] = schedule_expression if trigger_type == "schedule" else ""
+    tf_vars["event_source_arn"] = trigger_source if trigger_type == "queue" else ""
+    tf_vars["event_source_bucket"] = trigger_source if trigger_type == "storage" else ""
+
+    if website_enabled and not _clean_string(tf_vars.get("source_code")):
+        tf_vars["source_code"] = (
+            "from datetime import datetime\n\n"
+            "def lambda_handler(event, context):\n"
+            "    path = event.get('rawPath') or event.get('path') or '/'\n"
+            "    method = (\n"
+            "        event.get('requestContext', {}).get('http', {}).get('method')\n"
+            "        or event.get('httpMethod')\n"
+            "        or 'GET'\n"
+            "    )\n"
+            "    query = event.get('queryStringParameters') or {}\n"
+            "    name = query.get('name', 'Developer')\n"
+            "    html = (\n"
+            "        '<!doctype html><html><head><meta charset=\"utf-8\">'\n"
+            "        '<meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">'\n"
+            "        '<title>Cloud Function Website</title></head><body '\n"
+            "        'style=\"font-family:Arial;padding:24px;background:#0f172a;color:#e2e8f0\">'\n"
+            "        '<h1>Dynamic Website on Functions</h1>'\n"
+            "        f'<p>Hello, {name}.</p>'\n"
+            "        f'<p>Route: <code>{path}</code></p>'\n"
+            "        f'<p>Method: <code>{method}</code></p>'\n"
+            "        f'<p>UTC: <code>{datetime.utcnow().isoformat()}Z</code></p>'\n"
+            "        '</body></html>'\n"
+            "    )\n"
+            "    return {\n"
+            "        'statusCode': 200,\n"
+            "        'headers': {'Content-Type': 'text/html; charset=utf-8', 'Cache-Control': 'no-store'},\n"
+            "        'body': html,\n"
+            "    }\n"
+        )
+    return tf_vars
+
+
+def _azure_vm_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    if "region" in tf_vars and "location" not in tf_vars:
+        tf_vars["location"] = tf_vars["region"]
+    tf_vars.setdefault("vm_name", resource.name)
+    tf_vars.setdefault("resource_group_name", f"nebula-rg-{resource.id}")
+    return tf_vars
+
+
+def _azure_network_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    if "region" in tf_vars and "location" not in tf_vars:
+        tf_vars["location"] = tf_vars["region"]
+    tf_vars.setdefault("network_name", resource.name)
+    tf_vars.setdefault("resource_group_name", f"nebula-net-rg-{resource.id}")
+    # Handle both 'cidr' and 'cidr_block' for compatibility
+    if "cidr" in tf_vars and "cidr_block" not in tf_vars:
+        tf_vars["cidr_block"] = tf_vars.pop("cidr")
+    tf_vars.setdefault("cidr_block", "10.0.0.0/16")
+    return tf_vars
+
+
+def _azure_storage_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    if "region" in tf_vars and "location" not in tf_vars:
+        tf_vars["location"] = tf_vars["region"]
+    return tf_vars
+
+
+def _azure_faas_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    if "region" in tf_vars and "location" not in tf_vars:
+        tf_vars["location"] = tf_vars["region"]
+    function_stub = _sanitize_kebab_name(resource.name, "cloud-simplify-fn", max_length=45)
+    tf_vars.setdefault("function_app_name", f"{function_stub}-{resource.id}")
+    tf_vars.setdefault("resource_group_name", f"nebula-fn-rg-{resource.id}")
+    tf_vars.setdefault("service_plan_name", f"nebula-fn-plan-{resource.id}")
+    tf_vars.setdefault("storage_account_name", _sanitize_azure_storage_account_name(resource.name, resource.id))
+    tf_vars.setdefault("runtime_version", "3.11")
+    trigger_type = _normalize_function_trigger("azure", tf_vars.get("trigger_type"))
+    tf_vars["trigger_type"] = trigger_type
+    tf_vars["website_enabled"] = _as_bool(tf_vars.get("website_enabled"), trigger_type == "http")
+    tf_vars["route_path"] = _clean_string(tf_vars.get("route_path"), "/")
+    tf_vars["trigger_source"] = _clean_string(tf_vars.get("trigger_source"))
+    tf_vars["schedule_expression"] = _clean_string(
+        tf_vars.get("trigger_schedule_expression") or tf_vars.get("schedule_expression")
+    )
+    tf_vars["action_destination_url"] = _clean_string(tf_vars.get("action_destination_url"))
+    tf_vars["on_success_destination"] = _clean_string(tf_vars.get("on_success_destination"))
+    tf_vars["on_failure_destination"] = _clean_string(tf_vars.get("on_failure_destination"))
+    tf_vars["allowed_origins"] = _as_string_list(tf_vars.get("allowed_origins")) or ["*"]
+    return tf_vars
+
+
+def _gcp_vm_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("region", "us-central1")
+    tf_vars.setdefault("instance_name", resource.name)
+    if "zone" not in tf_vars:
+        tf_vars["zone"] = f"{tf_vars['region']}-a"
+    return tf_vars
+
+
+def _gcp_network_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("region", "us-central1")
+    tf_vars.setdefault("network_name", resource.name)
+    # Handle both 'cidr' and 'cidr_block' for compatibility
+    if "cidr" in tf_vars and "cidr_block" not in tf_vars:
+        tf_vars["cidr_block"] = tf_vars.pop("cidr")
+    tf_vars.setdefault("cidr_block", "10.0.0.0/16")
+    tf_vars["enable_private_access"] = _as_bool(tf_vars.get("enable_private_access"), True)
+    return tf_vars
+
+
+def _gcp_faas_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("region", "us-central1")
+    gcp_function_name = _clean_string(tf_vars.get("function_name"), resource.name)
+    tf_vars["function_name"] = _sanitize_kebab_name(gcp_function_name, "cloud-simplify-fn")
+    tf_vars.setdefault("runtime", "python311")
+    tf_vars.setdefault("entry_point", "handler")
+    tf_vars.setdefault("memory_mb", 256)
+    tf_vars.setdefault("timeout_seconds", 60)
+    trigger_type = _normalize_function_trigger("gcp", tf_vars.get("trigger_type"))
+    trigger_source = _clean_string(tf_vars.get("trigger_source"))
+    website_enabled = _as_bool(tf_vars.get("website_enabled"), trigger_type == "http")
+
+    tf_vars["trigger_type"] = trigger_type
+    tf_vars["website_enabled"] = website_enabled
+    tf_vars["trigger_resource"] = trigger_source if trigger_type in {"pubsub", "storage", "event"} else ""
+    tf_vars["trigger_event_type"] = _clean_string(tf_vars.get("trigger_event_type"))
+    tf_vars["action_destination_url"] = _clean_string(tf_vars.get("action_destination_url"))
+    tf_vars["on_success_destination"] = _clean_string(tf_vars.get("on_success_destination"))
+    tf_vars["on_failure_destination"] = _clean_string(tf_vars.get("on_failure_destination"))
+    tf_vars["allowed_origins"] = _as_string_list(tf_vars.get("allowed_origins")) or ["*"]
+    tf_vars["event_retry_on_failure"] = _as_bool(tf_vars.get("event_retry_on_failure"), False)
+
+    if not tf_vars["trigger_event_type"] and trigger_type == "pubsub":
+        tf_vars["trigger_event_type"] = "google.pubsub.topic.publish"
+    if not tf_vars["trigger_event_type"] and trigger_type in {"storage", "event"}:
+        tf_vars["trigger_event_type"] = "google.storage.object.finalize"
+
+    if website_enabled and not _clean_string(tf_vars.get("source_code")):
+        tf_vars["source_code"] = (
+            "from datetime import datetime\n\n"
+            "def handler(request):\n"
+            "    name = request.args.get('name', 'Developer') if request.args else 'Developer'\n"
+            "    html = (\n"
+            "        '<!doctype html><html><head><meta charset=\"utf-8\">'\n"
+            "        '<meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">'\n"
+            "        '<title>Cloud Function Website</title></head><body '\n"
+            "        'style=\"font-family:Arial;padding:24px;background:#111827;color:#f9fafb\">'\n"
+            "        '<h1>Dynamic Website on Cloud Functions</h1>'\n"
+            "        f'<p>Hello, {name}.</p>'\n"
+            "        f'<p>UTC: <code>{datetime.utcnow().isoformat()}Z</code></p>'\n"
+            "        '</body></html>'\n"
+            "    )\n"
+            "    return (html, 200, {'Content-Type': 'text/html; charset=utf-8'})\n"
+        )
+    return tf_vars
+
+
+def _gcp_storage_tf_vars(resource: Resource, tf_vars: Dict[str, object]) -> Dict[str, object]:
+    tf_vars.setdefault("region", "us-central1")
+    return tf_vars
+
+
+# Map (provider, type) to correct Terraform module directory
+MODULE_MAP: Dict[Tuple[str, str], str] = {
+    ("aws", "sqs"): "aws_sqs",
+    ("aws", "sns"): "aws_sns",
+    ("aws", "storage"): "aws_s3",
+    ("aws", "vm"): "aws_vm",
+    ("aws", "network"): "aws_network",
+    ("aws", "faas"): "aws_lambda",
+    ("azure", "storage"): "azure_blob",
+    ("azure", "vm"): "azure_vm",
+    ("azure", "network"): "azure_network",
+    ("azure", "faas"): "azure_functions",
+    ("gcp", "storage"): "gcp_storage",
+    ("gcp", "vm"): "gcp_vm",
+    ("gcp", "network"): "gcp_network",
+    ("gcp", "faas"): "gcp_functions",
+}
+
+
+TF_VAR_BUILDERS: Dict[Tuple[str, str], Callable[[Resource, Dict[str, object]], Dict[str, object]]] = {
+    ("aws", "vm"): _aws_vm_tf_vars,
+    ("aws", "sqs"): _aws_sqs_tf_vars,
+    ("aws", "sns"): _aws_sns_tf_vars,
+    ("aws", "network"): _aws_network_tf_vars,
+    ("aws", "faas"): _aws_faas_tf_vars,
+    ("azure", "vm"): _azure_vm_tf_vars,
+    ("azure", "network"): _azure_network_tf_vars,
+    ("azure", "storage"): _azure_storage_tf_vars,
+    ("azure", "faas"): _azure_faas_tf_vars,
+    ("gcp", "vm"): _gcp_vm_tf_vars,
+    ("gcp", "network"): _gcp_network_tf_vars,
+    ("gcp", "faas"): _gcp_faas_tf_vars,
+    ("gcp", "storage"): _gcp_storage_tf_vars,
+}
+
+
 class StorageWebsiteConfig(BaseModel):
     index_document: str = Field(default="index.html", min_length=1, max_length=255)
     error_document: str = Field(default="error.html", min_length=1, max_length=255)
@@ -213,6 +524,38 @@ class SnsSubscribePayload(BaseModel):
     raw_message_delivery: bool = False
 
 
+class VmBatchActionPayload(BaseModel):
+    action: Literal["start", "stop", "terminate"]
+    resource_ids: List[int] = Field(min_length=1, max_length=100)
+
+
+class StorageUploadUrlPayload(BaseModel):
+    key: str = Field(min_length=1, max_length=1024)
+    content_type: Optional[str] = Field(default=None, max_length=255)
+
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_URL_EXPIRES_SECONDS = 900
+# S3's limit for a single POST upload
+UPLOAD_URL_MAX_BYTES = 5 * 1024 ** 3
+DOWNLOAD_URL_EXPIRES_SECONDS = 300
+# Proxied uploads switch to parallel multipart transfers above 8 MiB
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
+
+def _iter_s3_body(body) -> Iterator[bytes]:
+    """Yield a StreamingBody in 1 MiB blocks, closing it even if the client disconnects."""
+    try:
+        yield from body.iter_chunks(DOWNLOAD_CHUNK_SIZE)
+    finally:
+        body.close()
+
+
 def _normalize_s3_key(value: str) -> str:
     return value.replace("\\", "/").strip().lstrip("/")
 
@@ -253,45 +596,57 @@ def _build_s3_website_urls(bucket_name: str, region: str) -> Tuple[str, str]:
     return dotted_style, dash_style
 
 
-def _get_storage_resource_for_user(
-    resource_id: int,
-    current_user: User,
-    db: Session,
-) -> Resource:
-    resource = (
-        db.query(Resource)
-        .join(Project)
-        .filter(Resource.id == resource_id, Project.user_id == current_user.id)
-        .first()
-    )
-    if not resource:
-        raise HTTPException(status_code=404, detail="Resource not found")
-    if resource.type != "storage":
-        raise HTTPException(status_code=400, detail="Resource is not a storage bucket")
-    return resource
-
-
+# With DEBUG set, a lazy relationship load on a resource returned by the
+# loaders below raises instead of silently issuing another query.
+# Resource.terraform_states stays loadable because db.delete() needs it.
+_DEBUG_LOADS = os.getenv("DEBUG", "").lower() in {"1", "true", "yes"}
+_RESOURCE_LOAD_OPTIONS = (raiseload(Resource.project),) if _DEBUG_LOADS else ()
+_INVENTORY_LOAD_OPTIONS = (raiseload("*"),) if _DEBUG_LOADS else ()
 
 
-def _get_inventory_resource_for_user(
+def _get_storage_resource_with_aws_credential(
     resource_id: int,
+    source: str,
     current_user: User,
     db: Session,
-) -> ResourceInventory:
-    resource = (
-        db.query(ResourceInventory)
-        .filter(ResourceInventory.id == resource_id, ResourceInventory.user_id == current_user.id)
-        .first()
-    )
-    if not resource:
-        raise HTTPException(status_code=404, detail="Inventory resource not found")
-    if resource.resource_type != "storage":
+) -> Tuple[Union[Resource, ResourceInventory], Optional[CloudCredential]]:
+    # The bucket and the user's latest AWS credential come back from one query.
+    latest_aws_credential = and_(CloudCredential.user_id == current_user.id, CloudCredential.provider == "aws")
+    if source == "inventory":
+        row = (
+            db.query(ResourceInventory, CloudCredential)
+            .outerjoin(CloudCredential, latest_aws_credential)
+            .filter(ResourceInventory.id == resource_id, ResourceInventory.user_id == current_user.id)
+            .order_by(CloudCredential.id.desc())
+            .options(*_INVENTORY_LOAD_OPTIONS)
+            .first()
+        )
+        if not row:
+            raise HTTPException(status_code=404, detail="Inventory resource not found")
+        resource_type = row[0].resource_type
+    else:
+        row = (
+            db.query(Resource, CloudCredential)
+            .join(Project)
+            .outerjoin(CloudCredential, latest_aws_credential)
+            .filter(Resource.id == resource_id, Project.user_id == current_user.id)
+            .order_by(CloudCredential.id.desc())
+            .options(*_RESOURCE_LOAD_OPTIONS)
+            .first()
+        )
+        if not row:
+            raise HTTPException(status_code=404, detail="Resource not found")
+        resource_type = row[0].type
+
+    if resource_type != "storage":
         raise HTTPException(status_code=400, detail="Resource is not a storage bucket")
-    return resource
+    resource, credential = row
+    return resource, credential
+
+
 def _get_aws_s3_client_for_storage_resource(
     resource: Union[Resource, ResourceInventory],
-    current_user: User,
-    db: Session,
+    credential: Optional[CloudCredential],
 ):
     if (resource.provider or "").lower() != "aws":
         raise HTTPException(
@@ -299,23 +654,7 @@ def _get_aws_s3_client_for_storage_resource(
             detail="Storage object operations are currently supported only for AWS resources",
         )
 
-    cred = (
-        db.query(CloudCredential)
-        .filter(
-            CloudCredential.user_id == current_user.id,
-            CloudCredential.provider == "aws",
-        )
-        .order_by(CloudCredential.id.desc())
-        .first()
-    )
-    if not cred:
-        raise HTTPException(status_code=400, detail="No AWS credential found for this user")
-
-    try:
-        cred_data = json.loads(decrypt_data(cred.encrypted_data))
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Failed to decrypt AWS credential: {exc}") from exc
-
+    cred_data = _decode_provider_credential("aws", credential)
     access_key = cred_data.get("access_key")
     secret_key = cred_data.get("secret_key")
     
@@ -339,31 +678,39 @@ def _get_aws_s3_client_for_storage_resource(
     if not bucket_name:
         raise HTTPException(status_code=400, detail="Bucket name is missing in resource configuration")
 
-    client = boto3.client(
-        "s3",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region,
-    )
+    client = aws_clients.get_client("s3", access_key, secret_key, region)
     return client, bucket_name
 
 
-def _get_vm_resource_for_user(
+def _get_vm_resource_with_aws_credential(
     resource_id: int,
     current_user: User,
     db: Session,
-) -> Resource:
-    resource = (
-        db.query(Resource)
+) -> Tuple[Resource, Optional[CloudCredential]]:
+    # The VM and the user's latest AWS credential come back from one query.
+    row = (
+        db.query(Resource, CloudCredential)
         .join(Project)
+        .outerjoin(
+            CloudCredential,
+            and_(CloudCredential.user_id == current_user.id, CloudCredential.provider == "aws"),
+        )
         .filter(Resource.id == resource_id, Project.user_id == current_user.id)
+        .order_by(CloudCredential.id.desc())
+        .options(*_RESOURCE_LOAD_OPTIONS)
         .first()
     )
-    if not resource:
+    if not row:
         raise HTTPException(status_code=404, detail="Resource not found")
+    resource, credential = row
     if resource.type != "vm":
         raise HTTPException(status_code=400, detail="Resource is not a virtual machine")
-    return resource
+    return resource, credential
+
+
+def _load_credential_data(credential: CloudCredential) -> object:
+    # decrypt_data caches the plaintext, so only the JSON parse repeats
+    return orjson.loads(decrypt_data(credential.encrypted_data))
 
 
 def _get_provider_credential_data(
@@ -380,12 +727,18 @@ def _get_provider_credential_data(
         .order_by(CloudCredential.id.desc())
         .first()
     )
+    return _decode_provider_credential(provider, credential)
+
+
+def _decode_provider_credential(
+    provider: str,
+    credential: Optional[CloudCredential],
+) -> Dict[str, str]:
     if not credential:
         raise HTTPException(status_code=400, detail=f"No {provider.upper()} credential found for this user")
 
     try:
-        decrypted_json = decrypt_data(credential.encrypted_data)
-        data = json.loads(decrypted_json)
+        data = _load_credential_data(credential)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"Failed to decrypt {provider.upper()} credential: {exc}") from exc
 
@@ -404,6 +757,7 @@ def _get_resource_for_user(
         db.query(Resource)
         .join(Project)
         .filter(Resource.id == resource_id, Project.user_id == current_user.id)
+        .options(*_RESOURCE_LOAD_OPTIONS)
         .first()
     )
     if not resource:
@@ -443,12 +797,7 @@ def _get_aws_sqs_client_for_resource(
         or credential_data.get("region")
         or "us-east-1"
     )
-    sqs_client = boto3.client(
-        "sqs",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region,
-    )
+    sqs_client = aws_clients.get_client("sqs", access_key, secret_key, region)
     return sqs_client, str(region)
 
 
@@ -496,12 +845,7 @@ def _get_aws_sns_client_for_resource(
         or credential_data.get("region")
         or "us-east-1"
     )
-    sns_client = boto3.client(
-        "sns",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region,
-    )
+    sns_client = aws_clients.get_client("sns", access_key, secret_key, region)
     return sns_client, str(region)
 
 
@@ -539,8 +883,7 @@ def _resolve_sns_topic_arn(
 
 def _get_aws_ec2_client_for_vm_resource(
     resource: Resource,
-    current_user: User,
-    db: Session,
+    credential: Optional[CloudCredential],
 ) -> Tuple[object, str]:
     if (resource.provider or "").lower() != "aws":
         raise HTTPException(
@@ -548,7 +891,7 @@ def _get_aws_ec2_client_for_vm_resource(
             detail="VM actions are currently supported only for AWS resources",
         )
 
-    credential_data = _get_provider_credential_data("aws", current_user, db)
+    credential_data = _decode_provider_credential("aws", credential)
     access_key = credential_data.get("access_key")
     secret_key = credential_data.get("secret_key")
 
@@ -563,64 +906,87 @@ def _get_aws_ec2_client_for_vm_resource(
         or "us-east-1"
     )
 
-    ec2_client = boto3.client(
-        "ec2",
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region,
-    )
+    ec2_client = aws_clients.get_client("ec2", access_key, secret_key, region)
     return ec2_client, str(region)
 
 
+_INSTANCE_ID_FIELDS = ("instance_id", "vm_id", "cloud_resource_id", "resource_id", "id")
+_INSTANCE_ID_RE = re.compile(r'instance_id\s*=\s*"?(i-[a-zA-Z0-9]+)"?')
+
+
 def _extract_instance_id_from_terraform_output(terraform_output: Optional[Dict[str, object]]) -> Optional[str]:
     if not terraform_output or not isinstance(terraform_output, dict):
         return None
 
-    possible_fields = ["instance_id", "vm_id", "cloud_resource_id", "resource_id", "id"]
-    for field in possible_fields:
-        value = terraform_output.get(field)
-        if isinstance(value, str) and value.startswith("i-"):
-            return value
+    value = next(
+        (
+            value
+            for value in map(terraform_output.get, _INSTANCE_ID_FIELDS)
+            if isinstance(value, str) and value.startswith("i-")
+        ),
+        None,
+    )
+    if value:
+        return value
 
     logs = terraform_output.get("logs")
     if isinstance(logs, str):
-        match = re.search(r'instance_id\s*=\s*"?((?:i-[a-zA-Z0-9]+))"?', logs)
+        match = _INSTANCE_ID_RE.search(logs)
         if match:
             return match.group(1)
 
     return None
 
 
-def _instance_exists(ec2_client, instance_id: str) -> bool:
+def _find_existing_instance_id(ec2_client, candidate_ids: List[str]) -> Optional[str]:
+    """Return the first candidate that exists, checking all of them in one call.
+
+    EC2 rejects the whole request if any id is unknown, so a stale id is not
+    allowed to hide a valid one: the candidates are then checked one at a
+    time before the caller falls back to the tag search.
+    """
     try:
-        response = ec2_client.describe_instances(InstanceIds=[instance_id])
+        response = ec2_client.describe_instances(InstanceIds=candidate_ids)
     except ClientError as exc:
         code = exc.response.get("Error", {}).get("Code")
         if code in {"InvalidInstanceID.NotFound", "InvalidInstanceID.Malformed"}:
-            return False
+            if len(candidate_ids) > 1:
+                for instance_id in candidate_ids:
+                    if _find_existing_instance_id(ec2_client, [instance_id]):
+                        return instance_id
+            return None
         raise
 
-    for reservation in response.get("Reservations", []):
-        for instance in reservation.get("Instances", []):
-            if instance.get("InstanceId") == instance_id:
-                return True
-    return False
+    found_ids = {
+        instance.get("InstanceId")
+        for reservation in response.get("Reservations", [])
+        for instance in reservation.get("Instances", [])
+    }
+    return next((instance_id for instance_id in candidate_ids if instance_id in found_ids), None)
 
 
 def _resolve_aws_instance_id(
     resource: Resource,
     ec2_client,
+    trust_stored_id: bool = True,
 ) -> Optional[str]:
+    stored_id = str(resource.cloud_resource_id or "")
+    if trust_stored_id and stored_id.startswith("i-"):
+        # Actions persist the id they acted on, so this skips the EC2 lookups.
+        # A stale id surfaces as NotFound from the action itself.
+        return stored_id
+
     candidate_ids: List[str] = []
-    if resource.cloud_resource_id and str(resource.cloud_resource_id).startswith("i-"):
-        candidate_ids.append(str(resource.cloud_resource_id))
+    if stored_id.startswith("i-"):
+        candidate_ids.append(stored_id)
 
     output_id = _extract_instance_id_from_terraform_output(resource.terraform_output)
-    if output_id:
+    if output_id and output_id not in candidate_ids:
         candidate_ids.append(output_id)
 
-    for instance_id in candidate_ids:
-        if _instance_exists(ec2_client, instance_id):
+    if candidate_ids:
+        instance_id = _find_existing_instance_id(ec2_client, candidate_ids)
+        if instance_id:
             return instance_id
 
     # Fallback: locate by Name tag for resources created by this platform.
@@ -646,27 +1012,95 @@ def _resolve_aws_instance_id(
     candidates.sort(key=lambda item: item[1], reverse=True)
     return candidates[0][0]
 
+
+def _find_instance_ids_by_name(ec2_client, names: List[str]) -> Dict[str, str]:
+    """Map each Name tag to its most recently launched live instance, in one call."""
+    response = ec2_client.describe_instances(
+        Filters=[
+            {"Name": "tag:Name", "Values": names},
+            {"Name": "instance-state-name", "Values": ["pending", "running", "stopping", "stopped"]},
+        ]
+    )
+
+    newest: Dict[str, Tuple[str, str]] = {}
+    for reservation in response.get("Reservations", []):
+        for instance in reservation.get("Instances", []):
+            instance_id = instance.get("InstanceId")
+            name = next((tag.get("Value") for tag in instance.get("Tags", []) if tag.get("Key") == "Name"), None)
+            launch_time = instance.get("LaunchTime")
+            launch_key = launch_time.isoformat() if launch_time else ""
+            if instance_id and name and (name not in newest or launch_key > newest[name][1]):
+                newest[name] = (instance_id, launch_key)
+    return {name: instance_id for name, (instance_id, _) in newest.items()}
+
+
+def _find_existing_instance_ids(ec2_client, instance_ids: List[str]) -> Set[str]:
+    """The subset of instance_ids EC2 knows, in one call that tolerates unknown ids."""
+    response = ec2_client.describe_instances(Filters=[{"Name": "instance-id", "Values": instance_ids}])
+    return {
+        instance.get("InstanceId")
+        for reservation in response.get("Reservations", [])
+        for instance in reservation.get("Instances", [])
+    }
+
+
+def _run_instance_action(resource: Resource, ec2_client, action) -> Tuple[str, Dict[str, object]]:
+    """Call an EC2 instance action, re-resolving once if the stored id is stale."""
+    instance_id = _resolve_aws_instance_id(resource, ec2_client)
+    if not instance_id:
+        raise HTTPException(status_code=404, detail="No AWS instance found for this resource")
+
+    try:
+        return instance_id, action(InstanceIds=[instance_id])
+    except ClientError as exc:
+        code = exc.response.get("Error", {}).get("Code")
+        if code != "InvalidInstanceID.NotFound" or instance_id != resource.cloud_resource_id:
+            raise
+
+    instance_id = _resolve_aws_instance_id(resource, ec2_client, trust_stored_id=False)
+    if not instance_id:
+        raise HTTPException(status_code=404, detail="No AWS instance found for this resource")
+    return instance_id, action(InstanceIds=[instance_id])
+
+# /stats fans out to every connected cloud account, so results are shared
+# across workers for a short time to absorb dashboard polling.
+RESOURCE_STATS_CACHE_SECONDS = 30
+
+
 @router.get("/stats")
 def get_resource_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    cache_key = resource_stats_cache_key(current_user.id)
+    cached = cache.get_json(cache_key)
+    if cached is not None:
+        return cached
+
     # 1. Get detailed cloud stats
     syncer = CloudSyncService(db, current_user.id)
     real_time_stats = syncer.get_aggregate_stats()
     
-    # 2. Get local DB stats
-    local_count = db.query(Resource).filter(
-        Project.user_id == current_user.id,
-        Resource.status == "active"
-    ).join(Project).count()
+    # 2. Get local DB stats, grouped in one query
+    local_rows = (
+        db.query(Resource.provider, Resource.type, func.count(Resource.id))
+        .join(Project)
+        .filter(Project.user_id == current_user.id, Resource.status == "active")
+        .group_by(Resource.provider, Resource.type)
+        .all()
+    )
+    local_count = sum(count for _, _, count in local_rows)
     
     # 3. Calculate simulated costs (Mocking logic for now based on count)
     total_cost = (real_time_stats["total_instances"] * 25.0) + (local_count * 10.0)
     
-    return {
+    stats = {
         "active_resources": real_time_stats["total_instances"],
         "managed_resources": local_count,
+        "managed_breakdown": [
+            {"provider": provider, "type": resource_type, "count": count}
+            for provider, resource_type, count in local_rows
+        ],
         "total_cost": f"${total_cost:.2f}",
         "storage_used": "1.2 TB", # Placeholder, would need S3/Blob sync
         "system_health": "100%",
@@ -674,10 +1108,47 @@ def get_resource_stats(
         "cost_by_provider": real_time_stats["cost_by_provider"],
         "cost_by_service": real_time_stats["cost_by_service"]
     }
+    cache.set_json(cache_key, stats, RESOURCE_STATS_CACHE_SECONDS)
+    return stats
+
+def _queue_provisioning(resource_id: int, provider: str, module_name: str, tf_vars: Dict[str, object]) -> None:
+    try:
+        # Publish once without broker retries or result tracking, so an
+        # unavailable broker fails fast.
+        provision_resource_task.apply_async(
+            kwargs={
+                "resource_id": str(resource_id),
+                "provider": provider,
+                "module_name": module_name,
+                "variables": tf_vars,
+            },
+            retry=False,
+            ignore_result=True,
+        )
+    except Exception as exc:
+        # Do not fail resource creation if async worker/broker is down.
+        logger.exception("Failed to queue provisioning task for resource %s", resource_id)
+        db = SessionLocal()
+        try:
+            db.query(Resource).filter(Resource.id == resource_id).update(
+                {
+                    Resource.status: "failed",
+                    Resource.terraform_output: {
+                        "error": "Failed to queue provisioning task",
+                        "detail": str(exc),
+                    },
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
 
 @router.post("/", response_model=ResourceResponse)
 def create_resource(
     resource_in: ResourceCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -723,8 +1194,7 @@ def create_resource(
             enforce_project_limit(db, current_user)
             project = Project(name="Default Project", user_id=current_user.id)
             db.add(project)
-            db.commit()
-            db.refresh(project)
+            db.flush()
 
     base_configuration = dict(resource_in.configuration or {})
 
@@ -737,269 +1207,22 @@ def create_resource(
         status="pending"
     )
     db.add(resource)
-    db.commit()
-    db.refresh(resource)
+    # Flush for the id used in the TF vars; everything is committed together
+    # below, so a rejected request leaves no pending row behind.
+    db.flush()
 
     # Trigger Async Job
-    # Map (provider, type) to correct Terraform module directory
-    MODULE_MAP = {
-        ("aws", "sqs"): "aws_sqs",
-        ("aws", "sns"): "aws_sns",
-        ("aws", "storage"): "aws_s3",
-        ("aws", "vm"): "aws_vm",
-        ("aws", "network"): "aws_network",
-        ("aws", "faas"): "aws_lambda",
-        ("azure", "storage"): "azure_blob",
-        ("azure", "vm"): "azure_vm",
-        ("azure", "network"): "azure_network",
-        ("azure", "faas"): "azure_functions",
-        ("gcp", "storage"): "gcp_storage",
-        ("gcp", "vm"): "gcp_vm",
-        ("gcp", "network"): "gcp_network",
-        ("gcp", "faas"): "gcp_functions",
-    }
-    
     module_name = MODULE_MAP.get((provider, resource_type), f"{provider}_{resource_type}")
     
-    # Map configuration to TF Vars
+    # Map configuration to TF Vars; the copy keeps values added here (such as
+    # GCP credentials) out of the stored configuration.
     tf_vars = dict(base_configuration)
-    
-    # Provider-specific variable translation
-    if provider == "aws" and resource_type == "vm":
-        tf_vars.setdefault("instance_name", resource.name)
-        tf_vars.setdefault("instance_type", "t3.micro")
-        region = tf_vars.get("region", "us-east-1")
-        tf_vars.setdefault("ami", AWS_DEFAULT_AMI_BY_REGION.get(region, AWS_DEFAULT_AMI_BY_REGION["us-east-1"]))
-
-        subnet_id = str(tf_vars.get("subnet_id", "")).strip()
-        if subnet_id:
-            tf_vars["subnet_id"] = subnet_id
-        else:
-            tf_vars.pop("subnet_id", None)
+    builder = TF_VAR_BUILDERS.get((provider, resource_type))
+    if builder:
+        tf_vars = builder(resource, tf_vars)
 
-        key_name = str(tf_vars.get("key_name", "")).strip()
-        if key_name:
-            tf_vars["key_name"] = key_name
-        else:
-            tf_vars.pop("key_name", None)
-
-        if "vpc_security_group_ids" not in tf_vars and "security_groups" in tf_vars:
-            security_groups_raw = tf_vars.pop("security_groups")
-            if isinstance(security_groups_raw, str):
-                security_group_ids = [item.strip() for item in security_groups_raw.split(",") if item.strip()]
-            elif isinstance(security_groups_raw, list):
-                security_group_ids = [str(item).strip() for item in security_groups_raw if str(item).strip()]
-            else:
-                security_group_ids = []
-
-            if security_group_ids:
-                tf_vars["vpc_security_group_ids"] = security_group_ids
-
-        if isinstance(tf_vars.get("vpc_security_group_ids"), str):
-            tf_vars["vpc_security_group_ids"] = [
-                item.strip() for item in str(tf_vars["vpc_security_group_ids"]).split(",") if item.strip()
-            ]
-    elif provider == "aws" and resource_type == "sqs":
-        tf_vars.setdefault("region", "us-east-1")
-        fifo_queue = _as_bool(tf_vars.get("fifo_queue"), False)
-        queue_name_input = _clean_string(tf_vars.get("queue_name"), resource.name)
-        tf_vars["queue_name"] = _sanitize_aws_sqs_queue_name(queue_name_input, fifo_queue=fifo_queue)
-        tf_vars["fifo_queue"] = fifo_queue
-        tf_vars["content_based_deduplication"] = _as_bool(
-            tf_vars.get("content_based_deduplication"),
-            fifo_queue,
-        )
-        tf_vars["visibility_timeout_seconds"] = _as_int(tf_vars.get("visibility_timeout_seconds"), 30)
-        tf_vars["message_retention_seconds"] = _as_int(tf_vars.get("message_retention_seconds"), 345600)
-        tf_vars["delay_seconds"] = _as_int(tf_vars.get("delay_seconds"), 0)
-        tf_vars["max_message_size"] = _as_int(tf_vars.get("max_message_size"), 262144)
-        tf_vars["receive_wait_time_seconds"] = _as_int(tf_vars.get("receive_wait_time_seconds"), 0)
-        tf_vars["enable_dlq"] = _as_bool(tf_vars.get("enable_dlq"), False)
-        dlq_name_input = _clean_string(tf_vars.get("dlq_name"), f"{resource.name}-dlq")
-        tf_vars["dlq_name"] = _sanitize_aws_sqs_queue_name(dlq_name_input, fifo_queue=fifo_queue)
-        tf_vars["redrive_max_receive_count"] = _as_int(tf_vars.get("redrive_max_receive_count"), 5)
-    elif provider == "aws" and resource_type == "sns":
-        tf_vars.setdefault("region", "us-east-1")
-        fifo_topic = _as_bool(tf_vars.get("fifo_topic"), False)
-        topic_name_input = _clean_string(tf_vars.get("topic_name"), resource.name)
-        tf_vars["topic_name"] = _sanitize_aws_sns_topic_name(topic_name_input, fifo_topic=fifo_topic)
-        tf_vars["fifo_topic"] = fifo_topic
-        tf_vars["content_based_deduplication"] = _as_bool(
-            tf_vars.get("content_based_deduplication"),
-            fifo_topic,
-        )
-        tf_vars["display_name"] = _clean_string(tf_vars.get("display_name"), resource.name)
-        tf_vars["delivery_policy"] = _clean_string(tf_vars.get("delivery_policy"))
-    elif provider == "aws" and resource_type == "network":
-        tf_vars.setdefault("region", "us-east-1")
-        tf_vars.setdefault("network_name", resource.name)
-        # Handle both 'cidr' and 'cidr_block' for compatibility
-        if "cidr" in tf_vars and "cidr_block" not in tf_vars:
-            tf_vars["cidr_block"] = tf_vars.pop("cidr")
-        tf_vars.setdefault("cidr_block", "10.0.0.0/16")
-        tf_vars["enable_dns_support"] = _as_bool(tf_vars.get("enable_dns_support"), True)
-        tf_vars["enable_dns_hostnames"] = _as_bool(tf_vars.get("enable_dns_hostnames"), True)
-    elif provider == "aws" and resource_type == "faas":
-        tf_vars.setdefault("region", "us-east-1")
-        aws_function_name = _clean_string(tf_vars.get("function_name"), resource.name)
-        tf_vars["function_name"] = _sanitize_aws_lambda_name(aws_function_name)
-        tf_vars.setdefault("runtime", "python3.11")
-        tf_vars.setdefault("handler", "index.lambda_handler")
-        tf_vars.setdefault("timeout", 30)
-        tf_vars.setdefault("memory_size", 128)
-        tf_vars.setdefault("description", f"Cloud Simplify managed Lambda for {resource.name}")
-        trigger_type = _normalize_function_trigger("aws", tf_vars.get("trigger_type"))
-        trigger_source = _clean_string(tf_vars.get("trigger_source"))
-        schedule_expression = _clean_string(
-            tf_vars.get("trigger_schedule_expression") or tf_vars.get("schedule_expression")
-        )
-        route_path = _clean_string(tf_vars.get("route_path"), "/")
-        if not route_path.startswith("/"):
-            route_path = f"/{route_path}"
-        action_destination_url = _clean_string(tf_vars.get("action_destination_url"))
-        on_success_destination = _clean_string(tf_vars.get("on_success_destination"))
-        on_failure_destination = _clean_string(tf_vars.get("on_failure_destination"))
-        website_enabled = _as_bool(tf_vars.get("website_enabled"), trigger_type == "http")
-        allowed_origins = _as_string_list(tf_vars.get("allowed_origins")) or ["*"]
-
-        tf_vars["trigger_type"] = trigger_type
-        tf_vars["website_enabled"] = website_enabled
-        tf_vars["route_path"] = route_path
-        tf_vars["allowed_origins"] = allowed_origins
-        tf_vars["action_destination_url"] = action_destination_url
-        tf_vars["on_success_destination_arn"] = on_success_destination
-        tf_vars["on_failure_destination_arn"] = on_failure_destination
-        tf_vars["schedule_expression"] = schedule_expression if trigger_type == "schedule" else ""
-        tf_vars["event_source_arn"] = trigger_source if trigger_type == "queue" else ""
-        tf_vars["event_source_bucket"] = trigger_source if trigger_type == "storage" else ""
-
-        if website_enabled and not _clean_string(tf_vars.get("source_code")):
-            tf_vars["source_code"] = (
-                "from datetime import datetime\n\n"
-                "def lambda_handler(event, context):\n"
-                "    path = event.get('rawPath') or event.get('path') or '/'\n"
-                "    method = (\n"
-                "        event.get('requestContext', {}).get('http', {}).get('method')\n"
-                "        or event.get('httpMethod')\n"
-                "        or 'GET'\n"
-                "    )\n"
-                "    query = event.get('queryStringParameters') or {}\n"
-                "    name = query.get('name', 'Developer')\n"
-                "    html = (\n"
-                "        '<!doctype html><html><head><meta charset=\"utf-8\">'\n"
-                "        '<meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">'\n"
-                "        '<title>Cloud Function Website</title></head><body '\n"
-                "        'style=\"font-family:Arial;padding:24px;background:#0f172a;color:#e2e8f0\">'\n"
-                "        '<h1>Dynamic Website on Functions</h1>'\n"
-                "        f'<p>Hello, {name}.</p>'\n"
-                "        f'<p>Route: <code>{path}</code></p>'\n"
-                "        f'<p>Method: <code>{method}</code></p>'\n"
-                "        f'<p>UTC: <code>{datetime.utcnow().isoformat()}Z</code></p>'\n"
-                "        '</body></html>'\n"
-                "    )\n"
-                "    return {\n"
-                "        'statusCode': 200,\n"
-                "        'headers': {'Content-Type': 'text/html; charset=utf-8', 'Cache-Control': 'no-store'},\n"
-                "        'body': html,\n"
-                "    }\n"
-            )
-    elif provider == "azure":
-        if resource_type == "vm":
-            if "region" in tf_vars and "location" not in tf_vars:
-                tf_vars["location"] = tf_vars["region"]
-            tf_vars.setdefault("vm_name", resource.name)
-            tf_vars.setdefault("resource_group_name", f"nebula-rg-{resource.id}")
-        elif resource_type == "network":
-            if "region" in tf_vars and "location" not in tf_vars:
-                tf_vars["location"] = tf_vars["region"]
-            tf_vars.setdefault("network_name", resource.name)
-            tf_vars.setdefault("resource_group_name", f"nebula-net-rg-{resource.id}")
-            # Handle both 'cidr' and 'cidr_block' for compatibility
-            if "cidr" in tf_vars and "cidr_block" not in tf_vars:
-                tf_vars["cidr_block"] = tf_vars.pop("cidr")
-            tf_vars.setdefault("cidr_block", "10.0.0.0/16")
-        elif resource_type == "storage":
-            if "region" in tf_vars and "location" not in tf_vars:
-                tf_vars["location"] = tf_vars["region"]
-        elif resource_type == "faas":
-            if "region" in tf_vars and "location" not in tf_vars:
-                tf_vars["location"] = tf_vars["region"]
-            function_stub = _sanitize_kebab_name(resource.name, "cloud-simplify-fn", max_length=45)
-            tf_vars.setdefault("function_app_name", f"{function_stub}-{resource.id}")
-            tf_vars.setdefault("resource_group_name", f"nebula-fn-rg-{resource.id}")
-            tf_vars.setdefault("service_plan_name", f"nebula-fn-plan-{resource.id}")
-            tf_vars.setdefault("storage_account_name", _sanitize_azure_storage_account_name(resource.name, resource.id))
-            tf_vars.setdefault("runtime_version", "3.11")
-            trigger_type = _normalize_function_trigger("azure", tf_vars.get("trigger_type"))
-            tf_vars["trigger_type"] = trigger_type
-            tf_vars["website_enabled"] = _as_bool(tf_vars.get("website_enabled"), trigger_type == "http")
-            tf_vars["route_path"] = _clean_string(tf_vars.get("route_path"), "/")
-            tf_vars["trigger_source"] = _clean_string(tf_vars.get("trigger_source"))
-            tf_vars["schedule_expression"] = _clean_string(
-                tf_vars.get("trigger_schedule_expression") or tf_vars.get("schedule_expression")
-            )
-            tf_vars["action_destination_url"] = _clean_string(tf_vars.get("action_destination_url"))
-            tf_vars["on_success_destination"] = _clean_string(tf_vars.get("on_success_destination"))
-            tf_vars["on_failure_destination"] = _clean_string(tf_vars.get("on_failure_destination"))
-            tf_vars["allowed_origins"] = _as_string_list(tf_vars.get("allowed_origins")) or ["*"]
-    elif provider == "gcp":
-        tf_vars.setdefault("region", "us-central1")
-        if resource_type == "vm":
-            tf_vars.setdefault("instance_name", resource.name)
-            if "zone" not in tf_vars:
-                tf_vars["zone"] = f"{tf_vars['region']}-a"
-        elif resource_type == "network":
-            tf_vars.setdefault("network_name", resource.name)
-            # Handle both 'cidr' and 'cidr_block' for compatibility
-            if "cidr" in tf_vars and "cidr_block" not in tf_vars:
-                tf_vars["cidr_block"] = tf_vars.pop("cidr")
-            tf_vars.setdefault("cidr_block", "10.0.0.0/16")
-            tf_vars["enable_private_access"] = _as_bool(tf_vars.get("enable_private_access"), True)
-        elif resource_type == "faas":
-            gcp_function_name = _clean_string(tf_vars.get("function_name"), resource.name)
-            tf_vars["function_name"] = _sanitize_kebab_name(gcp_function_name, "cloud-simplify-fn")
-            tf_vars.setdefault("runtime", "python311")
-            tf_vars.setdefault("entry_point", "handler")
-            tf_vars.setdefault("memory_mb", 256)
-            tf_vars.setdefault("timeout_seconds", 60)
-            trigger_type = _normalize_function_trigger("gcp", tf_vars.get("trigger_type"))
-            trigger_source = _clean_string(tf_vars.get("trigger_source"))
-            website_enabled = _as_bool(tf_vars.get("website_enabled"), trigger_type == "http")
-
-            tf_vars["trigger_type"] = trigger_type
-            tf_vars["website_enabled"] = website_enabled
-            tf_vars["trigger_resource"] = trigger_source if trigger_type in {"pubsub", "storage", "event"} else ""
-            tf_vars["trigger_event_type"] = _clean_string(tf_vars.get("trigger_event_type"))
-            tf_vars["action_destination_url"] = _clean_string(tf_vars.get("action_destination_url"))
-            tf_vars["on_success_destination"] = _clean_string(tf_vars.get("on_success_destination"))
-            tf_vars["on_failure_destination"] = _clean_string(tf_vars.get("on_failure_destination"))
-            tf_vars["allowed_origins"] = _as_string_list(tf_vars.get("allowed_origins")) or ["*"]
-            tf_vars["event_retry_on_failure"] = _as_bool(tf_vars.get("event_retry_on_failure"), False)
-
-            if not tf_vars["trigger_event_type"] and trigger_type == "pubsub":
-                tf_vars["trigger_event_type"] = "google.pubsub.topic.publish"
-            if not tf_vars["trigger_event_type"] and trigger_type in {"storage", "event"}:
-                tf_vars["trigger_event_type"] = "google.storage.object.finalize"
-
-            if website_enabled and not _clean_string(tf_vars.get("source_code")):
-                tf_vars["source_code"] = (
-                    "from datetime import datetime\n\n"
-                    "def handler(request):\n"
-                    "    name = request.args.get('name', 'Developer') if request.args else 'Developer'\n"
-                    "    html = (\n"
-                    "        '<!doctype html><html><head><meta charset=\"utf-8\">'\n"
-                    "        '<meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">'\n"
-                    "        '<title>Cloud Function Website</title></head><body '\n"
-                    "        'style=\"font-family:Arial;padding:24px;background:#111827;color:#f9fafb\">'\n"
-                    "        '<h1>Dynamic Website on Cloud Functions</h1>'\n"
-                    "        f'<p>Hello, {name}.</p>'\n"
-                    "        f'<p>UTC: <code>{datetime.utcnow().isoformat()}Z</code></p>'\n"
-                    "        '</body></html>'\n"
-                    "    )\n"
-                    "    return (html, 200, {'Content-Type': 'text/html; charset=utf-8'})\n"
-                )
-
-        gcp_credential_data = _get_provider_credential_data("gcp", current_user, db)
+    if provider == "gcp":
+        gcp_credential_data = _decode_provider_credential("gcp", credential)
         service_account_info = _extract_gcp_service_account_info(gcp_credential_data)
         project_id = _extract_gcp_project_id(gcp_credential_data, service_account_info)
 
@@ -1013,46 +1236,36 @@ def create_resource(
                 detail="GCP project_id is required in resource configuration or credential payload.",
             )
 
-    try:
-        provision_resource_task.delay(
-            resource_id=str(resource.id),
-            provider=provider,
-            module_name=module_name,
-            variables=tf_vars
-        )
-    except Exception as exc:
-        # Do not fail resource creation if async worker/broker is down.
-        logger.exception("Failed to queue provisioning task for resource %s", resource.id)
-        resource.status = "failed"
-        resource.terraform_output = {
-            "error": "Failed to queue provisioning task",
-            "detail": str(exc),
-        }
-        db.add(resource)
-        db.commit()
-        db.refresh(resource)
+    db.commit()
+    invalidate_resource_stats(current_user)
 
+    # The broker publish happens after the response has been sent
+    background_tasks.add_task(_queue_provisioning, resource.id, provider, module_name, tf_vars)
     return resource
 
 @router.get("/", response_model=List[ResourceResponse])
-def read_resources(
+async def read_resources(
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Join with projects to filter by user
-    resources = db.query(Resource).join(Project).filter(Project.user_id == current_user.id).offset(skip).limit(limit).all()
-    return resources
+    resources = await db.scalars(
+        select(Resource).join(Project).where(Project.user_id == current_user.id).offset(skip).limit(limit)
+    )
+    return resources.all()
 
 @router.get("/{resource_id}", response_model=ResourceResponse)
-def read_resource(
+async def read_resource(
     resource_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    resource = db.query(Resource).join(Project).filter(Resource.id == resource_id, Project.user_id == current_user.id).first()
-    if not resource:
+    # Primary-key lookups go through the identity map before issuing SQL
+    resource = await db.get(Resource, resource_id)
+    project = await db.get(Project, resource.project_id) if resource else None
+    if not project or project.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Resource not found")
     return resource
 
@@ -1062,16 +1275,14 @@ def delete_resource(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    resource = db.query(Resource).join(Project).filter(
-        Resource.id == resource_id, 
-        Project.user_id == current_user.id
-    ).first()
-    
-    if not resource:
+    resource = db.get(Resource, resource_id)
+    project = db.get(Project, resource.project_id) if resource else None
+    if not project or project.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Resource not found")
     
     db.delete(resource)
     db.commit()
+    invalidate_resource_stats(current_user)
     return {"message": "Resource record deleted successfully"}
 
 
@@ -1081,15 +1292,11 @@ def start_virtual_machine(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    resource = _get_vm_resource_for_user(resource_id, current_user, db)
-    ec2_client, region = _get_aws_ec2_client_for_vm_resource(resource, current_user, db)
-
-    instance_id = _resolve_aws_instance_id(resource, ec2_client)
-    if not instance_id:
-        raise HTTPException(status_code=404, detail="No AWS instance found for this resource")
+    resource, credential = _get_vm_resource_with_aws_credential(resource_id, current_user, db)
+    ec2_client, region = _get_aws_ec2_client_for_vm_resource(resource, credential)
 
     try:
-        response = ec2_client.start_instances(InstanceIds=[instance_id])
+        instance_id, response = _run_instance_action(resource, ec2_client, ec2_client.start_instances)
     except ClientError as exc:
         detail = exc.response.get("Error", {}).get("Message", str(exc))
         raise HTTPException(status_code=400, detail=f"Failed to start instance: {detail}") from exc
@@ -1099,17 +1306,18 @@ def start_virtual_machine(
     if started_instances:
         current_state = started_instances[0].get("CurrentState", {}).get("Name", "pending")
 
+    resource_status = "active" if current_state in {"pending", "running"} else resource.status
     resource.cloud_resource_id = instance_id
     resource.region = region
-    resource.status = "active" if current_state in {"pending", "running"} else resource.status
-    db.add(resource)
+    resource.status = resource_status
     db.commit()
+    invalidate_resource_stats(current_user)
 
     return {
         "message": "Start action submitted",
         "instance_id": instance_id,
         "state": current_state,
-        "resource_status": resource.status,
+        "resource_status": resource_status,
     }
 
 
@@ -1119,15 +1327,11 @@ def stop_virtual_machine(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    resource = _get_vm_resource_for_user(resource_id, current_user, db)
-    ec2_client, region = _get_aws_ec2_client_for_vm_resource(resource, current_user, db)
-
-    instance_id = _resolve_aws_instance_id(resource, ec2_client)
-    if not instance_id:
-        raise HTTPException(status_code=404, detail="No AWS instance found for this resource")
+    resource, credential = _get_vm_resource_with_aws_credential(resource_id, current_user, db)
+    ec2_client, region = _get_aws_ec2_client_for_vm_resource(resource, credential)
 
     try:
-        response = ec2_client.stop_instances(InstanceIds=[instance_id])
+        instance_id, response = _run_instance_action(resource, ec2_client, ec2_client.stop_instances)
     except ClientError as exc:
         detail = exc.response.get("Error", {}).get("Message", str(exc))
         raise HTTPException(status_code=400, detail=f"Failed to stop instance: {detail}") from exc
@@ -1137,17 +1341,18 @@ def stop_virtual_machine(
     if stopping_instances:
         current_state = stopping_instances[0].get("CurrentState", {}).get("Name", "stopping")
 
+    resource_status = "stopped" if current_state in {"stopping", "stopped"} else resource.status
     resource.cloud_resource_id = instance_id
     resource.region = region
-    resource.status = "stopped" if current_state in {"stopping", "stopped"} else resource.status
-    db.add(resource)
+    resource.status = resource_status
     db.commit()
+    invalidate_resource_stats(current_user)
 
     return {
         "message": "Stop action submitted",
         "instance_id": instance_id,
         "state": current_state,
-        "resource_status": resource.status,
+        "resource_status": resource_status,
     }
 
 
@@ -1157,10 +1362,11 @@ def destroy_virtual_machine(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    resource = _get_vm_resource_for_user(resource_id, current_user, db)
-    ec2_client, _ = _get_aws_ec2_client_for_vm_resource(resource, current_user, db)
+    resource, credential = _get_vm_resource_with_aws_credential(resource_id, current_user, db)
+    ec2_client, _ = _get_aws_ec2_client_for_vm_resource(resource, credential)
 
-    instance_id = _resolve_aws_instance_id(resource, ec2_client)
+    # Verify the stored id before terminating rather than trusting it
+    instance_id = _resolve_aws_instance_id(resource, ec2_client, trust_stored_id=False)
     cloud_action = "not_found"
 
     if instance_id:
@@ -1180,6 +1386,7 @@ def destroy_virtual_machine(
     resource_name = resource.name
     db.delete(resource)
     db.commit()
+    invalidate_resource_stats(current_user)
 
     return {
         "message": f'Resource "{resource_name}" deleted successfully',
@@ -1188,50 +1395,210 @@ def destroy_virtual_machine(
     }
 
 
+# action -> (EC2 method, response key, states that update the resource, resource status)
+_VM_BATCH_ACTIONS = {
+    "start": ("start_instances", "StartingInstances", {"pending", "running"}, "active"),
+    "stop": ("stop_instances", "StoppingInstances", {"stopping", "stopped"}, "stopped"),
+    "terminate": ("terminate_instances", "TerminatingInstances", set(), None),
+}
+
+
+@router.post("/vm/actions")
+def run_virtual_machine_batch_action(
+    payload: VmBatchActionPayload,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Start, stop or terminate many VMs with one EC2 call per region."""
+    method_name, response_key, applied_states, applied_status = _VM_BATCH_ACTIONS[payload.action]
+    resource_ids = list(dict.fromkeys(payload.resource_ids))
+
+    resources = (
+        db.query(Resource)
+        .join(Project)
+        .filter(Resource.id.in_(resource_ids), Project.user_id == current_user.id)
+        .options(*_RESOURCE_LOAD_OPTIONS)
+        .all()
+    )
+    credential = (
+        db.query(CloudCredential)
+        .filter(CloudCredential.user_id == current_user.id, CloudCredential.provider == "aws")
+        .order_by(CloudCredential.id.desc())
+        .first()
+    )
+
+    found_ids = {resource.id for resource in resources}
+    results: Dict[int, Dict[str, object]] = {
+        resource_id: {"resource_id": resource_id, "status": "not_found"}
+        for resource_id in resource_ids
+        if resource_id not in found_ids
+    }
+
+    by_region: Dict[str, Tuple[object, List[Resource]]] = {}
+    for resource in resources:
+        if resource.type != "vm" or (resource.provider or "").lower() != "aws":
+            results[resource.id] = {
+                "resource_id": resource.id,
+                "status": "error",
+                "detail": "Batch VM actions are supported only for AWS virtual machines",
+            }
+            continue
+        ec2_client, region = _get_aws_ec2_client_for_vm_resource(resource, credential)
+        by_region.setdefault(region, (ec2_client, []))[1].append(resource)
+
+    for region, (ec2_client, group) in by_region.items():
+        instance_ids: Dict[int, str] = {}
+        unresolved: List[Resource] = []
+        for resource in group:
+            stored_id = str(resource.cloud_resource_id or "")
+            instance_id = (
+                stored_id
+                if stored_id.startswith("i-")
+                else _extract_instance_id_from_terraform_output(resource.terraform_output)
+            )
+            if instance_id:
+                instance_ids[resource.id] = instance_id
+            else:
+                unresolved.append(resource)
+
+        if unresolved:
+            try:
+                ids_by_name = _find_instance_ids_by_name(ec2_client, sorted({resource.name for resource in unresolved}))
+            except ClientError as exc:
+                detail = exc.response.get("Error", {}).get("Message", str(exc))
+                ids_by_name = {}
+                for resource in unresolved:
+                    results[resource.id] = {"resource_id": resource.id, "status": "error", "detail": detail}
+            for resource in unresolved:
+                if resource.name in ids_by_name:
+                    instance_ids[resource.id] = ids_by_name[resource.name]
+                elif resource.id not in results:
+                    results[resource.id] = {"resource_id": resource.id, "status": "not_found"}
+
+        if not instance_ids:
+            continue
+
+        action = getattr(ec2_client, method_name)
+        try:
+            try:
+                response = action(InstanceIds=sorted(set(instance_ids.values())))
+            except ClientError as exc:
+                code = exc.response.get("Error", {}).get("Code")
+                if code not in {"InvalidInstanceID.NotFound", "InvalidInstanceID.Malformed"}:
+                    raise
+                # One stale id fails the whole call: keep the ids EC2 knows,
+                # falling back to the terraform output id, and retry once
+                by_id = {resource.id: resource for resource in group}
+                output_ids = {
+                    resource_id: _extract_instance_id_from_terraform_output(by_id[resource_id].terraform_output)
+                    for resource_id in instance_ids
+                }
+                existing = _find_existing_instance_ids(
+                    ec2_client,
+                    sorted(set(instance_ids.values()) | {output_id for output_id in output_ids.values() if output_id}),
+                )
+                for resource_id, instance_id in list(instance_ids.items()):
+                    if instance_id in existing:
+                        continue
+                    if output_ids[resource_id] in existing:
+                        instance_ids[resource_id] = output_ids[resource_id]
+                        continue
+                    del instance_ids[resource_id]
+                    results[resource_id] = {"resource_id": resource_id, "instance_id": instance_id, "status": "not_found"}
+                if not instance_ids:
+                    continue
+                response = action(InstanceIds=sorted(set(instance_ids.values())))
+        except ClientError as exc:
+            detail = exc.response.get("Error", {}).get("Message", str(exc))
+            for resource_id, instance_id in instance_ids.items():
+                results[resource_id] = {
+                    "resource_id": resource_id,
+                    "instance_id": instance_id,
+                    "status": "error",
+                    "detail": detail,
+                }
+            continue
+
+        states = {
+            item.get("InstanceId"): item.get("CurrentState", {}).get("Name", "unknown")
+            for item in response.get(response_key, [])
+        }
+        for resource in group:
+            instance_id = instance_ids.get(resource.id)
+            if not instance_id:
+                continue
+            state = states.get(instance_id, "unknown")
+            if payload.action == "terminate":
+                db.delete(resource)
+                resource_status = "deleted"
+            else:
+                resource_status = applied_status if state in applied_states else resource.status
+                resource.cloud_resource_id = instance_id
+                resource.region = region
+                resource.status = resource_status
+            results[resource.id] = {
+                "resource_id": resource.id,
+                "instance_id": instance_id,
+                "status": "submitted",
+                "state": state,
+                "resource_status": resource_status,
+            }
+
+    db.commit()
+    invalidate_resource_stats(current_user)
+
+    return {
+        "action": payload.action,
+        "results": [results[resource_id] for resource_id in resource_ids],
+    }
+
+
 @router.get("/{resource_id}/storage/objects")
 def list_storage_objects(
     resource_id: int,
     prefix: str = Query("", description="Optional key prefix"),
-    max_keys: int = Query(100, ge=1, le=500),
+    max_keys: int = Query(100, ge=1, le=5000),
     source: str = Query("provisioning", description="Source of the resource: 'provisioning' or 'inventory'"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    if source == 'inventory':
-        resource = _get_inventory_resource_for_user(resource_id, current_user, db)
-    else:
-        resource = _get_storage_resource_for_user(resource_id, current_user, db)
-        
-    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, current_user, db)
-
+    resource, credential = _get_storage_resource_with_aws_credential(resource_id, source, current_user, db)
+    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, credential)
+
+    # Listings beyond S3's 1000-key page are fetched here over the pooled
+    # keep-alive connection instead of by repeated API requests.
+    pages = s3_client.get_paginator("list_objects_v2").paginate(
+        Bucket=bucket_name,
+        Prefix=prefix or "",
+        PaginationConfig={"PageSize": min(max_keys, 1000), "MaxItems": max_keys},
+    )
+    contents = []
     try:
-        response = s3_client.list_objects_v2(
-            Bucket=bucket_name,
-            Prefix=prefix or "",
-            MaxKeys=max_keys,
-        )
+        for page in pages:
+            contents.extend(page.get("Contents", []))
     except ClientError as exc:
         detail = exc.response.get("Error", {}).get("Message", str(exc))
         raise HTTPException(status_code=400, detail=f"Failed to list bucket objects: {detail}") from exc
 
-    items = []
-    for obj in response.get("Contents", []):
-        last_modified = obj.get("LastModified")
-        items.append(
-            {
-                "key": obj.get("Key"),
-                "size": obj.get("Size", 0),
-                "etag": obj.get("ETag"),
-                "last_modified": last_modified.isoformat() if last_modified else None,
-            }
-        )
+    # LastModified stays a datetime: returning ORJSONResponse directly skips
+    # jsonable_encoder and orjson writes the same ISO format as isoformat().
+    items = [
+        {
+            "key": obj.get("Key"),
+            "size": obj.get("Size", 0),
+            "etag": obj.get("ETag"),
+            "last_modified": obj.get("LastModified"),
+        }
+        for obj in contents
+    ]
 
-    return {
+    return ORJSONResponse({
         "bucket": bucket_name,
         "count": len(items),
-        "truncated": bool(response.get("IsTruncated", False)),
+        # Set by the paginator when MaxItems stopped it before the last key
+        "truncated": pages.resume_token is not None,
         "items": items,
-    }
+    })
 
 
 @router.post("/{resource_id}/storage/upload")
@@ -1243,12 +1610,8 @@ def upload_storage_object(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    if source == 'inventory':
-        resource = _get_inventory_resource_for_user(resource_id, current_user, db)
-    else:
-        resource = _get_storage_resource_for_user(resource_id, current_user, db)
-        
-    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, current_user, db)
+    resource, credential = _get_storage_resource_with_aws_credential(resource_id, source, current_user, db)
+    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, credential)
 
     object_key = _normalize_s3_key(key or file.filename or "")
     if not object_key:
@@ -1260,9 +1623,11 @@ def upload_storage_object(
 
     try:
         if extra_args:
-            s3_client.upload_fileobj(file.file, bucket_name, object_key, ExtraArgs=extra_args)
+            s3_client.upload_fileobj(
+                file.file, bucket_name, object_key, ExtraArgs=extra_args, Config=UPLOAD_TRANSFER_CONFIG
+            )
         else:
-            s3_client.upload_fileobj(file.file, bucket_name, object_key)
+            s3_client.upload_fileobj(file.file, bucket_name, object_key, Config=UPLOAD_TRANSFER_CONFIG)
     except ClientError as exc:
         detail = exc.response.get("Error", {}).get("Message", str(exc))
         raise HTTPException(status_code=400, detail=f"Failed to upload object: {detail}") from exc
@@ -1279,6 +1644,50 @@ def upload_storage_object(
     }
 
 
+@router.post("/{resource_id}/storage/upload-url")
+def create_storage_upload_url(
+    resource_id: int,
+    payload: StorageUploadUrlPayload,
+    source: str = Query("provisioning", description="Source of the resource: 'provisioning' or 'inventory'"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Presigned POST so the browser uploads straight to S3 instead of through the API."""
+    resource, credential = _get_storage_resource_with_aws_credential(resource_id, source, current_user, db)
+    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, credential)
+
+    object_key = _normalize_s3_key(payload.key)
+    if not object_key:
+        raise HTTPException(status_code=400, detail="Object key is required")
+
+    fields = {}
+    conditions = [["content-length-range", 0, UPLOAD_URL_MAX_BYTES]]
+    if payload.content_type:
+        fields["Content-Type"] = payload.content_type
+        conditions.append({"Content-Type": payload.content_type})
+
+    try:
+        presigned = s3_client.generate_presigned_post(
+            bucket_name,
+            object_key,
+            Fields=fields or None,
+            Conditions=conditions,
+            ExpiresIn=UPLOAD_URL_EXPIRES_SECONDS,
+        )
+    except ClientError as exc:
+        detail = exc.response.get("Error", {}).get("Message", str(exc))
+        raise HTTPException(status_code=400, detail=f"Failed to create upload URL: {detail}") from exc
+
+    return {
+        "url": presigned["url"],
+        "fields": presigned["fields"],
+        "bucket": bucket_name,
+        "key": object_key,
+        "expires_in": UPLOAD_URL_EXPIRES_SECONDS,
+        "max_bytes": UPLOAD_URL_MAX_BYTES,
+    }
+
+
 @router.post("/{resource_id}/storage/upload-folder")
 def upload_storage_folder(
     resource_id: int,
@@ -1289,12 +1698,8 @@ def upload_storage_folder(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    if source == "inventory":
-        resource = _get_inventory_resource_for_user(resource_id, current_user, db)
-    else:
-        resource = _get_storage_resource_for_user(resource_id, current_user, db)
-
-    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, current_user, db)
+    resource, credential = _get_storage_resource_with_aws_credential(resource_id, source, current_user, db)
+    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, credential)
 
     if not files:
         raise HTTPException(status_code=400, detail="At least one file is required")
@@ -1323,9 +1728,11 @@ def upload_storage_folder(
                 extra_args["ContentType"] = upload_file.content_type
 
             if extra_args:
-                s3_client.upload_fileobj(upload_file.file, bucket_name, object_key, ExtraArgs=extra_args)
+                s3_client.upload_fileobj(
+                    upload_file.file, bucket_name, object_key, ExtraArgs=extra_args, Config=UPLOAD_TRANSFER_CONFIG
+                )
             else:
-                s3_client.upload_fileobj(upload_file.file, bucket_name, object_key)
+                s3_client.upload_fileobj(upload_file.file, bucket_name, object_key, Config=UPLOAD_TRANSFER_CONFIG)
 
             uploaded_keys.append(object_key)
     except ClientError as exc:
@@ -1357,12 +1764,8 @@ def download_storage_object(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    if source == 'inventory':
-        resource = _get_inventory_resource_for_user(resource_id, current_user, db)
-    else:
-        resource = _get_storage_resource_for_user(resource_id, current_user, db)
-        
-    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, current_user, db)
+    resource, credential = _get_storage_resource_with_aws_credential(resource_id, source, current_user, db)
+    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, credential)
 
     try:
         obj = s3_client.get_object(Bucket=bucket_name, Key=key)
@@ -1377,8 +1780,48 @@ def download_storage_object(
     media_type = obj.get("ContentType") or "application/octet-stream"
     filename = key.split("/")[-1] or "download"
     headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if obj.get("ContentLength") is not None:
+        headers["Content-Length"] = str(obj["ContentLength"])
+    if obj.get("ETag"):
+        headers["ETag"] = obj["ETag"]
+
+    # Pass the object through in 1 MiB blocks rather than StreamingBody's 1 KiB default
+    return StreamingResponse(_iter_s3_body(body), media_type=media_type, headers=headers)
+
+
+@router.get("/{resource_id}/storage/download-url")
+def create_storage_download_url(
+    resource_id: int,
+    key: str = Query(..., min_length=1),
+    source: str = Query("provisioning", description="Source of the resource: 'provisioning' or 'inventory'"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Presigned GET so the browser downloads straight from S3 instead of through the API."""
+    resource, credential = _get_storage_resource_with_aws_credential(resource_id, source, current_user, db)
+    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, credential)
+
+    filename = key.split("/")[-1] or "download"
+    try:
+        url = s3_client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": bucket_name,
+                "Key": key,
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=DOWNLOAD_URL_EXPIRES_SECONDS,
+        )
+    except ClientError as exc:
+        detail = exc.response.get("Error", {}).get("Message", str(exc))
+        raise HTTPException(status_code=400, detail=f"Failed to create download URL: {detail}") from exc
 
-    return StreamingResponse(body, media_type=media_type, headers=headers)
+    return {
+        "url": url,
+        "bucket": bucket_name,
+        "key": key,
+        "expires_in": DOWNLOAD_URL_EXPIRES_SECONDS,
+    }
 
 
 @router.get("/{resource_id}/storage/website")
@@ -1388,12 +1831,8 @@ def get_storage_website_config(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    if source == "inventory":
-        resource = _get_inventory_resource_for_user(resource_id, current_user, db)
-    else:
-        resource = _get_storage_resource_for_user(resource_id, current_user, db)
-
-    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, current_user, db)
+    resource, credential = _get_storage_resource_with_aws_credential(resource_id, source, current_user, db)
+    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, credential)
     region = _resolve_bucket_region(s3_client, bucket_name)
     website_url, alternate_website_url = _build_s3_website_urls(bucket_name, region)
 
@@ -1443,12 +1882,8 @@ def enable_storage_website(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    if source == "inventory":
-        resource = _get_inventory_resource_for_user(resource_id, current_user, db)
-    else:
-        resource = _get_storage_resource_for_user(resource_id, current_user, db)
-
-    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, current_user, db)
+    resource, credential = _get_storage_resource_with_aws_credential(resource_id, source, current_user, db)
+    s3_client, bucket_name = _get_aws_s3_client_for_storage_resource(resource, credential)
     region = _resolve_bucket_region(s3_client, bucket_name)
 
     index_document = _normalize_s3_key(payload.index_document)
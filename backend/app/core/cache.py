@@ -0,0 +1,116 @@
+"""
+Shared Redis cache helpers.
+
+The API uses the same Redis instance as Celery for short-lived cached values.
+Caching is strictly best effort: if Redis is not configured or unreachable,
+every helper degrades to a cache miss instead of failing the request.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Optional
+
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CACHE_REDIS_URL = (os.getenv("CACHE_REDIS_URL") or os.getenv("REDIS_URL") or "").strip()
+
+# After a connection failure, stop trying for a while so an unavailable Redis
+# does not add a connect timeout to every request.
+_RETRY_AFTER_SECONDS = 30
+
+_client: Optional[redis.Redis] = None
+_client_lock = threading.Lock()
+_unavailable_until = 0.0
+
+
+def get_redis() -> Optional[redis.Redis]:
+    global _client
+    if not CACHE_REDIS_URL or time.monotonic() < _unavailable_until:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    CACHE_REDIS_URL,
+                    socket_connect_timeout=0.25,
+                    socket_timeout=0.25,
+                )
+    return _client
+
+
+def _mark_unavailable(exc: Exception) -> None:
+    global _unavailable_until
+    _unavailable_until = time.monotonic() + _RETRY_AFTER_SECONDS
+    logger.warning(f"Redis cache unavailable, retrying in {_RETRY_AFTER_SECONDS}s: {exc}")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def get_json(key: str) -> Optional[Any]:
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(key)
+    except redis.RedisError as exc:
+        _mark_unavailable(exc)
+        return None
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def set_json(key: str, value: Any, ttl_seconds: int) -> None:
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(key, ttl_seconds, json.dumps(value, default=_json_default))
+    except redis.RedisError as exc:
+        _mark_unavailable(exc)
+
+
+def cost_rollup_version_key(user_id: int) -> str:
+    """Set by the daily cost roll-up whenever it rewrites a user's totals."""
+    return f"cost_rollup_version:{user_id}"
+
+
+def delete(*keys: str) -> None:
+    client = get_redis()
+    if client is None or not keys:
+        return
+    try:
+        client.delete(*keys)
+    except redis.RedisError as exc:
+        _mark_unavailable(exc)
+
+
+def acquire_lock(key: str, ttl_seconds: int) -> bool:
+    """Take a short-lived lock shared by all workers.
+
+    Returns True when Redis is unavailable so callers fall back to doing the
+    work themselves rather than never doing it.
+    """
+    client = get_redis()
+    if client is None:
+        return True
+    try:
+        return bool(client.set(key, 1, nx=True, ex=ttl_seconds))
+    except redis.RedisError as exc:
+        _mark_unavailable(exc)
+        return True
@@ -18,6 +18,10 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Acknowledge after the task runs so a crashed worker's task is redelivered
+    task_acks_late=True,
+    # Keep publishing from API workers from hanging on an unresponsive broker
+    broker_transport_options={"socket_timeout": 2, "socket_connect_timeout": 2},
 )
 
 @celery_app.task
@@ -0,0 +1,22 @@
+"""
+Request rate limiting for unauthenticated, CPU-heavy endpoints (bcrypt).
+
+Limits are tracked in process memory by default. Point RATE_LIMIT_STORAGE_URI
+at Redis (e.g. redis://redis:6379/2) to share the counters across workers.
+"""
+import os
+
+from dotenv import load_dotenv
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+load_dotenv()
+
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+AUTH_RATE_LIMIT = os.getenv("AUTH_RATE_LIMIT", "5/minute")
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    in_memory_fallback_enabled=True,
+)
@@ -1,13 +1,19 @@
 from datetime import datetime, timedelta
 from typing import Any, Union
-from jose import jwt
+from jose import jwk, jwt
 from passlib.context import CryptContext
+from cachetools import TTLCache, cached
 import os
+import threading
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 ALGORITHM = "HS256"
 SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key-change-this-in-prod")
 
+# Key material is normalised once here instead of on every encode/decode call
+_JWT_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
+_JWT_ALGORITHMS = [ALGORITHM]
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -16,6 +22,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def dummy_verify_password() -> None:
+    """Spends the time of a real bcrypt check so unknown emails can't be told apart by latency."""
+    pwd_context.dummy_verify()
+
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -23,9 +33,16 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def encode_token(claims: dict) -> str:
+    return jwt.encode(claims, _JWT_KEY, algorithm=ALGORITHM)
+
+def decode_token(token: str) -> dict:
+    """Verifies a token signed with SECRET_KEY and returns its claims. Raises JWTError."""
+    return jwt.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS)
+
 # --- Encryption for Cloud Credentials ---
 from cryptography.fernet import Fernet
 import base64
@@ -38,10 +55,16 @@ def _get_fernet_key() -> bytes:
 
 _fernet = Fernet(_get_fernet_key())
 
-def encrypt_data(data: str) -> str:
-    """Encrypts a string and returns a base64 encoded string."""
-    return _fernet.encrypt(data.encode()).decode()
+def encrypt_data(data: Union[str, bytes]) -> str:
+    """Encrypts a string (or already-encoded bytes) and returns a base64 encoded string."""
+    if isinstance(data, str):
+        data = data.encode()
+    return _fernet.encrypt(data).decode()
 
+# Ciphertext never changes for a stored credential, so repeated reads skip the
+# HMAC check and AES decrypt. Entries expire so decrypted secrets don't stay
+# in memory for the life of the process.
+@cached(TTLCache(maxsize=1024, ttl=300), lock=threading.Lock())
 def decrypt_data(data: str) -> str:
     """Decrypts a base64 encoded string and returns the original string."""
     return _fernet.decrypt(data.encode()).decode()
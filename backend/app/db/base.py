@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.functions import FunctionElement
+from functools import lru_cache
 import os
 from dotenv import load_dotenv
 
@@ -8,14 +12,96 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db/multicloud")
 
-engine = create_engine(DATABASE_URL)
+# Larger compiled-statement cache than the default 500 so the ORM queries of
+# every endpoint stay compiled; pool sizing only applies to server databases.
+_ENGINE_OPTIONS = {
+    "query_cache_size": int(os.getenv("DB_QUERY_CACHE_SIZE", "1200")),
+}
+_ASYNC_ENGINE_OPTIONS = dict(_ENGINE_OPTIONS)
+if not DATABASE_URL.startswith("sqlite"):
+    # DB_POOL_SIZE and DB_MAX_OVERFLOW are the budget of both engines together.
+    # Async endpoints still authenticate through a sync session, so a request
+    # can hold a connection from each pool; the async pool gets a quarter.
+    _pool_size = int(os.getenv("DB_POOL_SIZE", "20"))
+    _max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+    _async_pool_size = max(1, _pool_size // 4)
+    _async_max_overflow = _max_overflow // 4
+    _ENGINE_OPTIONS.update(
+        pool_size=max(1, _pool_size - _async_pool_size),
+        max_overflow=_max_overflow - _async_max_overflow,
+        pool_pre_ping=True,
+    )
+    _ASYNC_ENGINE_OPTIONS.update(
+        pool_size=_async_pool_size,
+        max_overflow=_async_max_overflow,
+        pool_pre_ping=True,
+    )
+
+engine = create_engine(DATABASE_URL, **_ENGINE_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sessions for GET endpoints: nothing is flushed or committed, and loaded
+# objects are never expired.
+ReadOnlySessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
+
+class utcnow(FunctionElement):
+    """Current UTC time as a naive timestamp, evaluated by the database.
+
+    Timestamp columns take it as both default= and server_default=. The
+    default is rendered into every ORM INSERT, so tables created before the
+    server default existed (SQLite can't add one in place) are still stamped.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_readonly_db():
+    db = ReadOnlySessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+# --- Async engine for `async def` endpoints ---
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+@lru_cache(maxsize=1)
+def get_async_sessionmaker() -> async_sessionmaker:
+    # Created on first use so workers that never serve async endpoints
+    # (Celery) don't need the async driver installed.
+    async_engine = create_async_engine(_async_database_url(DATABASE_URL), **_ASYNC_ENGINE_OPTIONS)
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
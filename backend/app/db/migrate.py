@@ -4,26 +4,49 @@ Creates all new tables for resource inventory, cost data, provider health, and t
 Run this after updating models
 """
 from sqlalchemy import inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
 from app.db.base import engine, Base
 from app.models.user import User
 from app.models.credential import CloudCredential
 from app.models.resource import Project, Resource
 from app.models.blueprint import Blueprint
-from app.models.resource_inventory import ResourceInventory, CostData, ProviderHealth, TerraformState
+from app.models.resource_inventory import ResourceInventory, CostData, CostDataDaily, ProviderHealth, TerraformState
 
 def create_tables():
     """Create all database tables"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
-    ensure_user_columns()
-    ensure_project_columns()
-    ensure_resource_columns()
+    # One inspector for every step, so table and column metadata is read once
+    inspector = inspect(engine)
+    ensure_user_columns(inspector)
+    ensure_project_columns(inspector)
+    ensure_resource_columns(inspector)
+    ensure_timestamp_defaults(inspector)
+    ensure_jsonb_columns(inspector)
+    ensure_indexes(inspector)
     print("✅ All tables created successfully!")
 
 
-def ensure_user_columns():
+def _add_missing_columns(conn, table: str, existing: set, column_defs: dict) -> None:
+    """Adds the missing columns, in a single ALTER TABLE on PostgreSQL."""
+    missing = [(column, ddl) for column, ddl in column_defs.items() if column not in existing]
+    if not missing:
+        return
+    for column, _ in missing:
+        print(f"Migrating {table}: Adding {column}")
+
+    if conn.dialect.name == "postgresql":
+        clauses = ", ".join(f"ADD COLUMN IF NOT EXISTS {column} {ddl}" for column, ddl in missing)
+        conn.execute(text(f"ALTER TABLE {table} {clauses}"))
+    else:
+        # SQLite takes one column per ALTER TABLE
+        for column, ddl in missing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def ensure_user_columns(inspector=None):
     """Adds missing profile/security columns to existing users table."""
-    inspector = inspect(engine)
+    inspector = inspector or inspect(engine)
     table_names = inspector.get_table_names()
     if "users" not in table_names:
         return
@@ -45,9 +68,7 @@ def ensure_user_columns():
     }
 
     with engine.begin() as conn:
-        for column, ddl in column_defs.items():
-            if column not in existing:
-                conn.execute(text(f"ALTER TABLE users ADD COLUMN {column} {ddl}"))
+        _add_missing_columns(conn, "users", existing, column_defs)
 
         conn.execute(
             text(
@@ -60,9 +81,9 @@ def ensure_user_columns():
         if dialect == "postgresql":
             conn.execute(text("ALTER TABLE users ALTER COLUMN hashed_password DROP NOT NULL"))
 
-def ensure_resource_columns():
+def ensure_resource_columns(inspector=None):
     """Adds missing columns to existing resources table."""
-    inspector = inspect(engine)
+    inspector = inspector or inspect(engine)
     table_names = inspector.get_table_names()
     if "resources" not in table_names:
         return
@@ -81,15 +102,12 @@ def ensure_resource_columns():
     }
 
     with engine.begin() as conn:
-        for column, ddl in column_defs.items():
-            if column not in existing:
-                print(f"Migrating resources: Adding {column}")
-                conn.execute(text(f"ALTER TABLE resources ADD COLUMN {column} {ddl}"))
+        _add_missing_columns(conn, "resources", existing, column_defs)
 
 
-def ensure_project_columns():
+def ensure_project_columns(inspector=None):
     """Adds missing columns to existing projects table."""
-    inspector = inspect(engine)
+    inspector = inspector or inspect(engine)
     table_names = inspector.get_table_names()
     if "projects" not in table_names:
         return
@@ -101,10 +119,102 @@ def ensure_project_columns():
     }
 
     with engine.begin() as conn:
-        for column, ddl in column_defs.items():
-            if column not in existing:
-                print(f"Migrating projects: Adding {column}")
-                conn.execute(text(f"ALTER TABLE projects ADD COLUMN {column} {ddl}"))
+        _add_missing_columns(conn, "projects", existing, column_defs)
+
+# Timestamp columns stamped by the database (server_default=utcnow()) rather than by Python
+TIMESTAMP_DEFAULT_COLUMNS = {
+    "projects": ("created_at",),
+    "resources": ("created_at",),
+    "cloud_credentials": ("created_at",),
+    "blueprints": ("created_at", "updated_at"),
+}
+
+def ensure_timestamp_defaults(inspector=None):
+    """Sets the UTC server default on timestamp columns of existing tables."""
+    inspector = inspector or inspect(engine)
+    table_names = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table, columns in TIMESTAMP_DEFAULT_COLUMNS.items():
+            if table not in table_names:
+                continue
+            if engine.dialect.name != "postgresql":
+                # SQLite cannot change a column default in place; the models'
+                # default= stamps new rows, so only rows left NULL are filled
+                for column in columns:
+                    conn.execute(text(f"UPDATE {table} SET {column} = CURRENT_TIMESTAMP WHERE {column} IS NULL"))
+                continue
+            clauses = ", ".join(
+                f"ALTER COLUMN {column} SET DEFAULT TIMEZONE('utc', CURRENT_TIMESTAMP)" for column in columns
+            )
+            conn.execute(text(f"ALTER TABLE {table} {clauses}"))
+
+# json columns the models now declare as JSONB on PostgreSQL
+JSONB_COLUMNS = {
+    "resource_inventory": ("resource_metadata", "tags"),
+}
+
+def ensure_jsonb_columns(inspector=None):
+    """Converts existing json columns to jsonb; runs before the GIN indexes are created."""
+    if engine.dialect.name != "postgresql":
+        return
+    inspector = inspector or inspect(engine)
+    table_names = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table, columns in JSONB_COLUMNS.items():
+            if table not in table_names:
+                continue
+            column_types = {col["name"]: col["type"] for col in inspector.get_columns(table)}
+            pending = [
+                column for column in columns
+                if column in column_types and not isinstance(column_types[column], JSONB)
+            ]
+            if not pending:
+                continue
+            for column in pending:
+                print(f"Migrating {table}: Converting {column} to jsonb")
+            clauses = ", ".join(f"ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb" for column in pending)
+            conn.execute(text(f"ALTER TABLE {table} {clauses}"))
+
+# Indexes dropped from the models because a newer index covers them
+SUPERSEDED_INDEXES = {
+    "resources": ("ix_resources_project_id",),  # covered by ix_resources_project_status
+}
+
+def ensure_indexes(inspector=None):
+    """Creates indexes declared on the models that are missing from existing tables.
+
+    A unique index that cannot be created (e.g. because of duplicate rows)
+    fails the migration: the API relies on those constraints to reject
+    duplicates. Other failures are reported and skipped.
+    """
+    inspector = inspector or inspect(engine)
+    table_names = set(inspector.get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in table_names:
+            continue
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                if index.unique:
+                    raise RuntimeError(
+                        f"Could not create unique index {index.name} on {table.name}; "
+                        f"remove the duplicate rows and rerun the migration"
+                    ) from e
+                print(f"Migrating {table.name}: Could not create index {index.name}: {e}")
+
+    with engine.begin() as conn:
+        for table, indexes in SUPERSEDED_INDEXES.items():
+            if table not in table_names:
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table)}
+            for name in indexes:
+                if name in existing:
+                    print(f"Migrating {table}: Dropping index {name}")
+                    conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
 
 if __name__ == "__main__":
     create_tables()
@@ -1,8 +1,7 @@
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Index
 from sqlalchemy.orm import relationship
 
-from app.db.base import Base
+from app.db.base import Base, utcnow
 
 
 class Blueprint(Base):
@@ -16,8 +15,14 @@ class Blueprint(Base):
     resource_type = Column(String(50), nullable=False, index=True)
     template = Column(JSON, nullable=False, default=dict)
     uses_count = Column(Integer, nullable=False, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
 
-    owner = relationship("User", backref="blueprints")
+    owner = relationship("User", backref="blueprints", lazy="raise_on_sql")
+
+    __table_args__ = (
+        Index("ix_blueprints_user_name", "user_id", "name", unique=True),
+        # Matches the listing order so the newest blueprints come straight off the index
+        Index("ix_blueprints_user_updated", user_id, updated_at.desc(), id.desc()),
+    )
 
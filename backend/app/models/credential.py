@@ -1,7 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
-from app.db.base import Base
+from app.db.base import Base, utcnow
 
 class CloudCredential(Base):
     __tablename__ = "cloud_credentials"
@@ -17,7 +16,14 @@ class CloudCredential(Base):
     # GCP: { "service_account_json": "..." }
     encrypted_data = Column(String) 
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
+
+    # Credential listing reads only these columns, so PostgreSQL can answer it from the index
+    __table_args__ = (
+        Index("ix_cloud_credentials_user", "user_id", postgresql_include=["id", "provider", "name", "created_at"]),
+        # Newest credential per provider (ORDER BY id DESC LIMIT 1) is a backward index scan
+        Index("ix_cloud_credentials_user_provider_id", "user_id", "provider", "id"),
+    )
 
     # For now, simplistic relationship assuming User model will update
     # owner = relationship("User", back_populates="credentials")
@@ -1,7 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON, DateTime, Float
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON, DateTime, Float, Index
 from sqlalchemy.orm import relationship
-from datetime import datetime
-from app.db.base import Base
+from app.db.base import Base, utcnow
 
 class Project(Base):
     __tablename__ = "projects"
@@ -10,11 +9,16 @@ class Project(Base):
     name = Column(String, index=True)
     description = Column(String, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
     
-    owner = relationship("User", back_populates="projects")
+    # Only user_id is read, so a lazy load of the owner is a bug
+    owner = relationship("User", back_populates="projects", lazy="raise_on_sql")
     resources = relationship("Resource", back_populates="project")
 
+    __table_args__ = (
+        Index("ix_projects_user_name", "user_id", "name", unique=True),
+    )
+
 # Add backref to User model (circular import handling needed usually, but for simple MVP we can monkeypatch or adding it to user.py is better. 
 # For now, let's assume User has 'projects' relationship defined or we define it here if SQLAlchemy allows, 
 # but best practice is to define it in User or use string reference.)
@@ -30,7 +34,7 @@ class Resource(Base):
     status = Column(String, default="pending") # pending, provisioning, active, failed, destroying
     configuration = Column(JSON)
     terraform_output = Column(JSON, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
     
     # Enhanced fields for real cloud data
     cloud_resource_id = Column(String(255))  # Actual cloud provider resource ID
@@ -43,3 +47,8 @@ class Resource(Base):
     drift_status = Column(String(20), default='synced')  # synced, drift, unknown
 
     project = relationship("Project", back_populates="resources")
+
+    # Serves the project joins on its own and the status="active" filters of /stats
+    __table_args__ = (
+        Index("ix_resources_project_status", "project_id", "status"),
+    )
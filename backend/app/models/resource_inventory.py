@@ -1,8 +1,17 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime, Float, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Date, DateTime, Float, Index, UniqueConstraint, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.orm import Session, relationship
 from datetime import datetime
+from typing import List, Optional, Set
 from app.db.base import Base
 
+# Rows per INSERT ... ON CONFLICT statement in ResourceInventory.bulk_upsert
+BULK_UPSERT_CHUNK_SIZE = 1000
+
+# Binary JSON on PostgreSQL, so filters don't reparse the text and GIN indexes
+# can serve containment (@>) and key (?) lookups
+JSONB_DOCUMENT = JSONB().with_variant(JSON(), 'sqlite')
+
 
 class ResourceInventory(Base):
     """Cached cloud resources from provider APIs"""
@@ -19,23 +28,70 @@ class ResourceInventory(Base):
     instance_type = Column(String(50))  # For VMs: t3.medium, Standard_B2s, etc.
     public_ip = Column(String(50))
     private_ip = Column(String(50))
-    resource_metadata = Column(JSON)  # Provider-specific details (renamed from metadata)
-    tags = Column(JSON)
+    resource_metadata = Column(JSONB_DOCUMENT)  # Provider-specific details (renamed from metadata)
+    tags = Column(JSONB_DOCUMENT)
     cost_per_hour = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
     last_synced_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    # Relationships
-    user = relationship("User", backref="resource_inventory")
+    # Relationships. The many-to-one sides are never navigated (queries filter
+    # on the id columns), so a lazy load raises instead of querying per row.
+    user = relationship("User", backref="resource_inventory", lazy="raise_on_sql")
 
-    # Unique constraint: one resource per provider per user
+    # Unique constraint: one resource per provider per user. The indexes back
+    # the inventory listings (user + type, newest sync first), region filters,
+    # the dashboard's recent-resources list and its per-user aggregates, which
+    # PostgreSQL answers from the covering index alone
     __table_args__ = (
         UniqueConstraint('provider', 'resource_id', 'user_id', name='uix_provider_resource_user'),
+        Index('ix_resource_inventory_user_type_synced', 'user_id', 'resource_type', 'last_synced_at'),
+        Index('ix_resource_inventory_user_region', 'user_id', 'region'),
+        Index('ix_resource_inventory_user_synced', 'user_id', 'last_synced_at'),
+        Index(
+            'ix_resource_inventory_user_provider_type', 'user_id', 'provider', 'resource_type',
+            postgresql_include=['status', 'created_at', 'region'],
+        ),
+        Index('ix_resource_inventory_tags', 'tags', postgresql_using='gin'),
+        Index('ix_resource_inventory_metadata', 'resource_metadata', postgresql_using='gin'),
     )
 
     def __repr__(self):
         return f"<ResourceInventory {self.provider}:{self.resource_type}:{self.resource_name}>"
 
+    @classmethod
+    def bulk_upsert(cls, db: Session, rows: List[dict], user_id: int, provider: str) -> None:
+        """
+        Insert or update synced resources, up to 1000 per INSERT ... ON CONFLICT
+        
+        Rows match on uix_provider_resource_user. Only the columns present in the
+        synced rows are overwritten, so values set elsewhere (cost_per_hour) and
+        created_at are kept for existing resources. Runs in the caller's transaction.
+        """
+        columns = cls.__table__.c
+        now = datetime.utcnow()
+        
+        # One row per resource id: a statement may not update the same row twice
+        by_resource_id = {}
+        for row in rows:
+            values = {key: value for key, value in row.items() if key in columns}
+            values.update(user_id=user_id, provider=provider, last_synced_at=now)
+            by_resource_id[values['resource_id']] = values
+        
+        # A multi-row VALUES needs the same keys in every row
+        groups = {}
+        for values in by_resource_id.values():
+            groups.setdefault(frozenset(values), []).append(values)
+        
+        conflict_keys = ('provider', 'resource_id', 'user_id')
+        for keys, group in groups.items():
+            for start in range(0, len(group), BULK_UPSERT_CHUNK_SIZE):
+                stmt = pg_insert(cls.__table__).values(group[start:start + BULK_UPSERT_CHUNK_SIZE])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(conflict_keys),
+                    set_={key: stmt.excluded[key] for key in keys if key not in conflict_keys},
+                )
+                db.execute(stmt)
+
 
 class CostData(Base):
     """Billing and cost information from cloud providers"""
@@ -54,12 +110,79 @@ class CostData(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
-    user = relationship("User", backref="cost_data")
+    user = relationship("User", backref="cost_data", lazy="raise_on_sql")
+
+    # Covers the per-user date-range scans and service grouping in billing;
+    # on PostgreSQL the aggregates run as index-only scans. The created_at
+    # index serves the dashboard ETag's latest-record probe.
+    __table_args__ = (
+        Index(
+            'ix_cost_data_user_period_service', 'user_id', 'period_start', 'service_name',
+            postgresql_include=['cost_amount', 'provider', 'period_end'],
+        ),
+        Index('ix_cost_data_user_created', 'user_id', 'created_at'),
+    )
 
     def __repr__(self):
         return f"<CostData {self.provider}:{self.service_name}:${self.cost_amount}>"
 
 
+class CostDataDaily(Base):
+    """Daily cost totals per provider and service, rolled up from CostData"""
+    __tablename__ = "cost_data_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    provider = Column(String(20), nullable=False)
+    service_name = Column(String(100), nullable=False, default='')  # '' when the cost has no service
+    cost_amount = Column(Float, nullable=False)
+
+    # One row per user, day, provider and service; the index leads with
+    # (user_id, day) so it also serves the dashboard's date-range sums
+    __table_args__ = (
+        UniqueConstraint('user_id', 'day', 'provider', 'service_name', name='uix_cost_daily_user_day_provider_service'),
+    )
+
+    @classmethod
+    def refresh(cls, db: Session, since: Optional[datetime] = None) -> Set[int]:
+        """
+        Recompute the daily totals of every day from `since` onwards, or of all days
+        
+        The days are cleared first so totals whose cost records were removed
+        don't linger, then rebuilt with one INSERT ... SELECT. Runs in the
+        caller's transaction; a concurrent refresh fails on the unique index
+        and rolls back.
+        
+        Returns:
+            Ids of the users whose totals were rewritten
+        """
+        # date() truncates to the day on PostgreSQL and SQLite alike; CAST AS
+        # DATE would keep only the year on SQLite
+        day = func.date(CostData.period_start, type_=Date)
+        service_name = func.coalesce(CostData.service_name, '')
+        totals = select(
+            CostData.user_id, day, CostData.provider, service_name, func.sum(CostData.cost_amount)
+        ).group_by(CostData.user_id, day, CostData.provider, service_name)
+        clear = delete(cls)
+        cleared_users = select(cls.user_id).distinct()
+        if since is not None:
+            totals = totals.where(CostData.period_start >= since)
+            clear = clear.where(cls.day >= since.date())
+            cleared_users = cleared_users.where(cls.day >= since.date())
+        user_ids = set(db.scalars(cleared_users))
+        user_ids.update(db.scalars(select(totals.subquery().c.user_id).distinct()))
+        db.execute(clear)
+        
+        db.execute(insert(cls).from_select(
+            ['user_id', 'day', 'provider', 'service_name', 'cost_amount'], totals
+        ))
+        return user_ids
+
+    def __repr__(self):
+        return f"<CostDataDaily {self.day}:{self.provider}:{self.service_name}:${self.cost_amount}>"
+
+
 class ProviderHealth(Base):
     """API connectivity and health status for cloud providers"""
     __tablename__ = "provider_health"
@@ -74,8 +197,13 @@ class ProviderHealth(Base):
     response_time_ms = Column(Integer)
 
     # Relationships
-    user = relationship("User", backref="provider_health")
-    credential = relationship("CloudCredential", backref="health_checks")
+    user = relationship("User", backref="provider_health", lazy="raise_on_sql")
+    credential = relationship("CloudCredential", backref="health_checks", lazy="raise_on_sql")
+
+    # Health upserts look rows up by user, provider and credential
+    __table_args__ = (
+        Index('ix_provider_health_user_provider_credential', 'user_id', 'provider', 'credential_id'),
+    )
 
     def __repr__(self):
         return f"<ProviderHealth {self.provider}:{self.status}>"
@@ -97,7 +225,7 @@ class TerraformState(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    resource = relationship("Resource", backref="terraform_states")
+    resource = relationship("Resource", backref="terraform_states", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<TerraformState resource_id={self.resource_id} drift={self.drift_detected}>"
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Any, Dict, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 
 
 class BlueprintBase(BaseModel):
@@ -21,5 +21,4 @@ class BlueprintResponse(BlueprintBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-     from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Dict, Any, Optional
 from datetime import datetime
 
@@ -18,5 +18,4 @@ class CredentialResponse(CredentialBase):
     created_at: datetime
     # We NEVER return the actual credentials in the response for security
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
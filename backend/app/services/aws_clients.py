@@ -0,0 +1,45 @@
+"""
+Shared boto3 client cache.
+
+Building a boto3 client loads and parses the botocore service model, which
+costs far more than the API call it is usually made for. Clients are
+thread-safe once created, so one client per (service, credentials, region)
+is kept and reused across requests along with its connection pool.
+"""
+import hashlib
+import threading
+
+import boto3
+from botocore.config import Config
+from cachetools import LRUCache
+
+# botocore's default pool of 10 connections serialises bursts such as
+# parallel S3 listings and downloads through one client.
+CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    retries={"mode": "adaptive", "max_attempts": 5},
+)
+
+# The inventory sync holds one EC2 client per enabled region for each credential
+_clients: LRUCache = LRUCache(maxsize=256)
+# boto3's default session is not thread-safe, so clients are also built under the lock
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str, access_key: str, secret_key: str, region: str):
+    """Return a cached boto3 client for the given service, credentials and region."""
+    # Only a digest of the secret is kept in the cache key
+    key = (service, access_key, hashlib.sha256(secret_key.encode()).hexdigest(), region)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = boto3.client(
+                service,
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region,
+                config=CLIENT_CONFIG,
+            )
+            _clients[key] = client
+    return client
@@ -2,13 +2,25 @@
 AWS Resource Synchronization Service
 Fetches real-time resource inventory from AWS using boto3
 """
-import boto3
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, Optional
 import logging
+import queue
+import threading
+import time
+
+from app.services import aws_clients
 
 logger = logging.getLogger(__name__)
 
+# Region and bucket lookups are network-bound, so they are fanned out over
+# threads instead of being made one after another.
+_sync_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="aws-sync")
+
+# Result pages buffered between the region workers and the consumer of a
+# multi-region sync
+REGION_PAGE_BUFFER = 4
+
 
 class AWSResourceSync:
     """Real-time AWS resource inventory sync"""
@@ -21,57 +33,100 @@ class AWSResourceSync:
             credentials: Dict with 'access_key', 'secret_key', 'region'
         """
         self.region = credentials.get('region', 'us-east-1')
+        self._access_key = credentials['access_key']
+        self._secret_key = credentials['secret_key']
         
+        # Clients come from the shared cache, so repeated syncs of the same
+        # credential don't reload the botocore service models
         try:
-            self.ec2 = boto3.client(
-                'ec2',
-                aws_access_key_id=credentials['access_key'],
-                aws_secret_access_key=credentials['secret_key'],
-                region_name=self.region
-            )
-            
-            self.s3 = boto3.client(
-                's3',
-                aws_access_key_id=credentials['access_key'],
-                aws_secret_access_key=credentials['secret_key'],
-                region_name=self.region
-            )
+            self.ec2 = self._client('ec2', self.region)
+            self.s3 = self._client('s3', self.region)
             
             # Cost Explorer (only available in us-east-1)
-            self.ce = boto3.client(
-                'ce',
-                aws_access_key_id=credentials['access_key'],
-                aws_secret_access_key=credentials['secret_key'],
-                region_name='us-east-1'
-            )
+            self.ce = self._client('ce', 'us-east-1')
         except Exception as e:
             logger.error(f"Failed to initialize AWS clients: {e}")
             raise
     
-    def _get_tag_value(self, resource: dict, tag_key: str) -> Optional[str]:
-        """Extract tag value from AWS resource tags"""
-        tags = resource.get('Tags', [])
-        for tag in tags:
-            if tag['Key'] == tag_key:
-                return tag['Value']
-        return None
+    def _client(self, service: str, region: str):
+        return aws_clients.get_client(service, self._access_key, self._secret_key, region)
+    
+    def _get_tags(self, resource: dict) -> Dict[str, str]:
+        """AWS resource tags as a {key: value} dict"""
+        return {tag['Key']: tag['Value'] for tag in resource.get('Tags', ())}
+    
+    def _enabled_regions(self) -> List[str]:
+        """Regions enabled for the account, or just the configured one if they can't be listed"""
+        try:
+            response = self.ec2.describe_regions()
+            return [region['RegionName'] for region in response['Regions']]
+        except Exception as e:
+            logger.warning(f"Could not list AWS regions, syncing {self.region} only: {e}")
+            return [self.region]
     
-    def sync_ec2_instances(self) -> List[dict]:
+    def _across_regions(self, fetch: Callable[[object, str], Iterator[List[dict]]]) -> Iterator[dict]:
         """
-        Fetch all EC2 instances
+        Run fetch(ec2_client, region), a generator of result pages, for every
+        enabled region in parallel
         
-        Returns:
-            List of instance dictionaries with standardized fields
+        At most one region per worker thread is fetched at a time, and pages
+        are handed over through a bounded queue, so a slow consumer holds back
+        the fetches instead of letting whole regions pile up in memory. A
+        region that fails is logged and skipped so the others still sync.
         """
+        regions = self._enabled_regions()
+        # Clients are resolved up front so the worker threads only make API calls
+        clients = [self._client('ec2', region) for region in regions]
+        pages: queue.Queue = queue.Queue(maxsize=REGION_PAGE_BUFFER)
+        region_done = object()
+        abandoned = threading.Event()
+        
+        def hand_over(item) -> bool:
+            # Waits for room in the queue, giving up once the consumer has stopped
+            while not abandoned.is_set():
+                try:
+                    pages.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def fetch_region(ec2, region: str) -> None:
+            try:
+                for page in fetch(ec2, region):
+                    if not hand_over(page):
+                        return
+            except Exception as e:
+                logger.warning(f"Skipping AWS region {region}: {e}")
+            finally:
+                hand_over(region_done)
+        
+        for ec2, region in zip(clients, regions):
+            _sync_executor.submit(fetch_region, ec2, region)
+        
+        remaining = len(regions)
         try:
-            response = self.ec2.describe_instances()
+            while remaining:
+                page = pages.get()
+                if page is region_done:
+                    remaining -= 1
+                    continue
+                yield from page
+        finally:
+            abandoned.set()
+    
+    def _instance_pages(self, ec2, region: str) -> Iterator[List[dict]]:
+        """Instances visible to one regional client, one page at a time"""
+        paginator = ec2.get_paginator('describe_instances')
+        
+        for page in paginator.paginate(PaginationConfig={'PageSize': 1000}):
             instances = []
-            
-            for reservation in response['Reservations']:
+            for reservation in page['Reservations']:
                 for instance in reservation['Instances']:
+                    tags = self._get_tags(instance)
                     instances.append({
                         'resource_id': instance['InstanceId'],
-                        'resource_name': self._get_tag_value(instance, 'Name') or instance['InstanceId'],
+                        'resource_name': tags.get('Name') or instance['InstanceId'],
                         'resource_type': 'vm',
                         'status': instance['State']['Name'],
                         'region': instance['Placement']['AvailabilityZone'][:-1],  # Remove zone suffix
@@ -80,59 +135,94 @@ class AWSResourceSync:
                         'private_ip': instance.get('PrivateIpAddress'),
                         'resource_metadata': {
                             'ami_id': instance['ImageId'],
-                            'launch_time': instance['LaunchTime'].isoformat(),
+                            'launch_time': int(instance['LaunchTime'].timestamp()),
                             'vpc_id': instance.get('VpcId'),
                             'subnet_id': instance.get('SubnetId'),
                             'availability_zone': instance['Placement']['AvailabilityZone'],
                             'platform': instance.get('Platform', 'linux'),
                         },
-                        'tags': {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+                        'tags': tags
                     })
-            
-            logger.info(f"Synced {len(instances)} EC2 instances from AWS")
-            return instances
-            
-        except Exception as e:
-            logger.error(f"Error syncing EC2 instances: {e}")
-            return []
+            yield instances
+    
+    def _vpc_pages(self, ec2, region: str) -> Iterator[List[dict]]:
+        """VPCs visible to one regional client, one page at a time"""
+        paginator = ec2.get_paginator('describe_vpcs')
+        
+        for page in paginator.paginate():
+            vpcs = []
+            for vpc in page['Vpcs']:
+                tags = self._get_tags(vpc)
+                vpcs.append({
+                    'resource_id': vpc['VpcId'],
+                    'resource_name': tags.get('Name') or vpc['VpcId'],
+                    'resource_type': 'vpc',
+                    'status': vpc['State'],
+                    'region': region,
+                    'resource_metadata': {
+                        'cidr_block': vpc['CidrBlock'],
+                        'is_default': vpc['IsDefault'],
+                    },
+                    'tags': tags
+                })
+            yield vpcs
+    
+    def iter_ec2_instances_all_regions(self) -> Iterator[dict]:
+        """
+        Stream EC2 instances from every enabled region, regions fetched in parallel
+        
+        Yields:
+            Instance dictionaries with standardized fields
+        """
+        count = 0
+        for instance in self._across_regions(self._instance_pages):
+            count += 1
+            yield instance
+        logger.info(f"Synced {count} EC2 instances from AWS")
+    
+    def _bucket_details(self, bucket: dict) -> Optional[dict]:
+        bucket_name = bucket['Name']
+        
+        try:
+            # Get bucket location
+            location_response = self.s3.get_bucket_location(Bucket=bucket_name)
+        except Exception as bucket_error:
+            logger.warning(f"Could not get details for bucket {bucket_name}: {bucket_error}")
+            return None
+        region = location_response['LocationConstraint'] or 'us-east-1'
+        
+        # Get bucket size (approximate - would need CloudWatch for accurate data)
+        # For now, we'll mark it as 0 and update via CloudWatch in a future enhancement
+        
+        return {
+            'resource_id': bucket_name,
+            'resource_name': bucket_name,
+            'resource_type': 'storage',
+            'status': 'active',
+            'region': region,
+            'resource_metadata': {
+                'creation_date': int(bucket['CreationDate'].timestamp()),
+                'bucket_type': 's3',
+            },
+            'tags': {}  # Would need separate API call to get bucket tags
+        }
     
     def sync_s3_buckets(self) -> List[dict]:
         """
         Fetch all S3 buckets
         
+        The per-bucket location lookups run in parallel.
+        
         Returns:
             List of bucket dictionaries with standardized fields
         """
         try:
             response = self.s3.list_buckets()
-            buckets = []
-            
-            for bucket in response['Buckets']:
-                bucket_name = bucket['Name']
-                
-                try:
-                    # Get bucket location
-                    location_response = self.s3.get_bucket_location(Bucket=bucket_name)
-                    region = location_response['LocationConstraint'] or 'us-east-1'
-                    
-                    # Get bucket size (approximate - would need CloudWatch for accurate data)
-                    # For now, we'll mark it as 0 and update via CloudWatch in a future enhancement
-                    
-                    buckets.append({
-                        'resource_id': bucket_name,
-                        'resource_name': bucket_name,
-                        'resource_type': 'storage',
-                        'status': 'active',
-                        'region': region,
-                        'resource_metadata': {
-                            'creation_date': bucket['CreationDate'].isoformat(),
-                            'bucket_type': 's3',
-                        },
-                        'tags': {}  # Would need separate API call to get bucket tags
-                    })
-                except Exception as bucket_error:
-                    logger.warning(f"Could not get details for bucket {bucket_name}: {bucket_error}")
-                    continue
+            buckets = [
+                details
+                for details in _sync_executor.map(self._bucket_details, response['Buckets'])
+                if details
+            ]
             
             logger.info(f"Synced {len(buckets)} S3 buckets from AWS")
             return buckets
@@ -143,29 +233,13 @@ class AWSResourceSync:
     
     def sync_vpcs(self) -> List[dict]:
         """
-        Fetch all VPCs
+        Fetch all VPCs in the configured region
         
         Returns:
             List of VPC dictionaries
         """
         try:
-            response = self.ec2.describe_vpcs()
-            vpcs = []
-            
-            for vpc in response['Vpcs']:
-                vpcs.append({
-                    'resource_id': vpc['VpcId'],
-                    'resource_name': self._get_tag_value(vpc, 'Name') or vpc['VpcId'],
-                    'resource_type': 'vpc',
-                    'status': vpc['State'],
-                    'region': self.region,
-                    'resource_metadata': {
-                        'cidr_block': vpc['CidrBlock'],
-                        'is_default': vpc['IsDefault'],
-                    },
-                    'tags': {tag['Key']: tag['Value'] for tag in vpc.get('Tags', [])}
-                })
-            
+            vpcs = [vpc for page in self._vpc_pages(self.ec2, self.region) for vpc in page]
             logger.info(f"Synced {len(vpcs)} VPCs from AWS")
             return vpcs
             
@@ -232,13 +306,13 @@ class AWSResourceSync:
         Returns:
             Dict with status, response_time_ms, error_message
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter_ns()
         
         try:
             # Simple API call to check connectivity
             self.ec2.describe_regions()
             
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
+            response_time = (time.perf_counter_ns() - start_time) // 1_000_000
             
             return {
                 'status': 'healthy' if response_time < 1000 else 'degraded',
@@ -246,7 +320,7 @@ class AWSResourceSync:
                 'error_message': None
             }
         except Exception as e:
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
+            response_time = (time.perf_counter_ns() - start_time) // 1_000_000
             return {
                 'status': 'error',
                 'response_time_ms': int(response_time),
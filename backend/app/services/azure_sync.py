@@ -6,12 +6,17 @@ from azure.identity import ClientSecretCredential
 from azure.mgmt.compute import ComputeManagementClient
 from azure.mgmt.storage import StorageManagementClient
 from azure.mgmt.resource import ResourceManagementClient
-from typing import List, Dict, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Instance views are one request per VM, so each page of VMs is fetched
+# concurrently, at most 16 requests in flight.
+_sync_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="azure-sync")
+
 
 class AzureResourceSync:
     """Real-time Azure resource inventory sync"""
@@ -49,84 +54,90 @@ class AzureResourceSync:
         except (ValueError, IndexError):
             return 'unknown'
     
-    def sync_vms(self) -> List[dict]:
+    def _get_power_state(self, vm) -> str:
+        """Power state from the VM's instance view, or 'unknown'"""
+        try:
+            instance_view = self.compute.virtual_machines.instance_view(
+                self._get_resource_group(vm.id),
+                vm.name
+            )
+        except Exception as view_error:
+            logger.warning(f"Could not get instance view for {vm.name}: {view_error}")
+            return 'unknown'
+        
+        for status in instance_view.statuses:
+            if status.code.startswith('PowerState/'):
+                return status.code.split('/')[-1]
+        return 'unknown'
+    
+    def iter_vms(self) -> Iterator[dict]:
         """
-        Fetch all Azure VMs
+        Stream all Azure VMs
         
-        Returns:
-            List of VM dictionaries with standardized fields
+        VMs are read a page at a time; the instance views of a page are
+        fetched in parallel.
+        
+        Yields:
+            VM dictionaries with standardized fields
         """
+        count = 0
         try:
-            vms = []
-            
-            for vm in self.compute.virtual_machines.list_all():
-                resource_group = self._get_resource_group(vm.id)
-                
-                # Get instance view for detailed status
-                try:
-                    instance_view = self.compute.virtual_machines.instance_view(
-                        resource_group,
-                        vm.name
-                    )
-                    
-                    # Extract power state
-                    power_state = 'unknown'
-                    for status in instance_view.statuses:
-                        if status.code.startswith('PowerState/'):
-                            power_state = status.code.split('/')[-1]
-                            break
-                    
-                except Exception as view_error:
-                    logger.warning(f"Could not get instance view for {vm.name}: {view_error}")
-                    power_state = 'unknown'
+            for page in self.compute.virtual_machines.list_all().by_page():
+                page_vms = list(page)
+                power_states = _sync_executor.map(self._get_power_state, page_vms)
                 
-                # Get network interfaces for IP addresses
-                public_ip = None
-                private_ip = None
-                
-                if vm.network_profile and vm.network_profile.network_interfaces:
-                    # This would require additional API calls to get actual IPs
-                    # For now, we'll leave them as None and enhance later
-                    pass
-                
-                vms.append({
-                    'resource_id': vm.id,
-                    'resource_name': vm.name,
-                    'resource_type': 'vm',
-                    'status': power_state,
-                    'region': vm.location,
-                    'instance_type': vm.hardware_profile.vm_size if vm.hardware_profile else 'unknown',
-                    'public_ip': public_ip,
-                    'private_ip': private_ip,
-                    'resource_metadata': {
-                        'resource_group': resource_group,
-                        'os_type': vm.storage_profile.os_disk.os_type if vm.storage_profile else 'unknown',
-                        'vm_id': vm.vm_id,
-                    },
-                    'tags': vm.tags or {}
-                })
+                for vm, power_state in zip(page_vms, power_states):
+                    count += 1
+                    yield self._vm_to_dict(vm, power_state)
             
-            logger.info(f"Synced {len(vms)} Azure VMs")
-            return vms
+            logger.info(f"Synced {count} Azure VMs")
             
         except Exception as e:
             logger.error(f"Error syncing Azure VMs: {e}")
-            return []
     
-    def sync_storage_accounts(self) -> List[dict]:
+    def _vm_to_dict(self, vm, power_state: str) -> dict:
+        resource_group = self._get_resource_group(vm.id)
+        
+        # Get network interfaces for IP addresses
+        public_ip = None
+        private_ip = None
+        
+        if vm.network_profile and vm.network_profile.network_interfaces:
+            # This would require additional API calls to get actual IPs
+            # For now, we'll leave them as None and enhance later
+            pass
+        
+        return {
+            'resource_id': vm.id,
+            'resource_name': vm.name,
+            'resource_type': 'vm',
+            'status': power_state,
+            'region': vm.location,
+            'instance_type': vm.hardware_profile.vm_size if vm.hardware_profile else 'unknown',
+            'public_ip': public_ip,
+            'private_ip': private_ip,
+            'resource_metadata': {
+                'resource_group': resource_group,
+                'os_type': vm.storage_profile.os_disk.os_type if vm.storage_profile else 'unknown',
+                'vm_id': vm.vm_id,
+            },
+            'tags': vm.tags or {}
+        }
+    
+    def iter_storage_accounts(self) -> Iterator[dict]:
         """
-        Fetch all Azure storage accounts
+        Stream all Azure storage accounts
         
-        Returns:
-            List of storage account dictionaries
+        Yields:
+            Storage account dictionaries
         """
+        count = 0
         try:
-            accounts = []
-            
             for account in self.storage.storage_accounts.list():
                 resource_group = self._get_resource_group(account.id)
                 
-                accounts.append({
+                count += 1
+                yield {
                     'resource_id': account.id,
                     'resource_name': account.name,
                     'resource_type': 'storage',
@@ -136,17 +147,15 @@ class AzureResourceSync:
                         'resource_group': resource_group,
                         'sku': account.sku.name if account.sku else 'unknown',
                         'kind': account.kind.value if account.kind else 'unknown',
-                        'creation_time': account.creation_time.isoformat() if account.creation_time else None,
+                        'creation_time': int(account.creation_time.timestamp()) if account.creation_time else None,
                     },
                     'tags': account.tags or {}
-                })
+                }
             
-            logger.info(f"Synced {len(accounts)} Azure storage accounts")
-            return accounts
+            logger.info(f"Synced {count} Azure storage accounts")
             
         except Exception as e:
             logger.error(f"Error syncing Azure storage accounts: {e}")
-            return []
     
     def sync_resource_groups(self) -> List[dict]:
         """
@@ -207,13 +216,13 @@ class AzureResourceSync:
         Returns:
             Dict with status, response_time_ms, error_message
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter_ns()
         
         try:
             # Simple API call to check connectivity
             list(self.resource.resource_groups.list())
             
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
+            response_time = (time.perf_counter_ns() - start_time) // 1_000_000
             
             return {
                 'status': 'healthy' if response_time < 1000 else 'degraded',
@@ -221,7 +230,7 @@ class AzureResourceSync:
                 'error_message': None
             }
         except Exception as e:
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
+            response_time = (time.perf_counter_ns() - start_time) // 1_000_000
             return {
                 'status': 'error',
                 'response_time_ms': int(response_time),
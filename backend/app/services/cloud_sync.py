@@ -1,4 +1,4 @@
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 from azure.identity import ClientSecretCredential
 from azure.mgmt.compute import ComputeManagementClient
 from google.oauth2 import service_account
@@ -6,8 +6,13 @@ import googleapiclient.discovery
 import json
 from app.core.security import decrypt_data
 from app.models.credential import CloudCredential
+from app.services import aws_clients
 from sqlalchemy.orm import Session
 
+# Provider API calls are network-bound, so the per-credential counts are
+# fetched in parallel instead of one account after another.
+_counts_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cloud-counts")
+
 class CloudSyncService:
     def __init__(self, db: Session, user_id: int):
         self.db = db
@@ -16,11 +21,11 @@ class CloudSyncService:
     def get_aws_counts(self, cred: CloudCredential):
         try:
             data = json.loads(decrypt_data(cred.encrypted_data))
-            client = boto3.client(
+            client = aws_clients.get_client(
                 'ec2',
-                aws_access_key_id=data['access_key'],
-                aws_secret_access_key=data['secret_key'],
-                region_name=data.get('region', 'us-east-1')
+                data['access_key'],
+                data['secret_key'],
+                data.get('region', 'us-east-1')
             )
             # Count running instances
             response = client.describe_instances(Filters=[{'Name': 'instance-state-name', 'Values': ['running']}])
@@ -65,8 +70,19 @@ class CloudSyncService:
         # Placeholder for GCP implementation
         return {"compute": 0, "storage": 0}
 
+    def _get_counts(self, cred: CloudCredential):
+        if cred.provider == 'aws':
+            # AWS only returns a compute count
+            return {"compute": self.get_aws_counts(cred), "storage": 0}
+        if cred.provider == 'azure':
+            return self.get_azure_counts(cred)
+        if cred.provider == 'gcp':
+            return self.get_gcp_counts(cred)
+        return {"compute": 0, "storage": 0}
+
     def get_aggregate_stats(self):
         creds = self.db.query(CloudCredential).filter(CloudCredential.user_id == self.user_id).all()
+        all_counts = list(_counts_executor.map(self._get_counts, creds))
         
         stats = {
             "total_instances": 0,
@@ -88,22 +104,11 @@ class CloudSyncService:
             "gcp": {"compute": 24.0, "storage": 4.0}
         }
 
-        for cred in creds:
-            counts = {"compute": 0, "storage": 0}
+        for cred, counts in zip(creds, all_counts):
             provider_name = cred.provider.upper()
 
-            if cred.provider == 'aws':
-                # AWS currently only returns computation count in get_aws_counts, 
-                # let's adapt it to return a dict for consistency
-                count = self.get_aws_counts(cred)
-                counts["compute"] = count
-                stats["aws_count"] += count
-            elif cred.provider == 'azure':
-                counts = self.get_azure_counts(cred)
-                stats["azure_count"] += counts["compute"]
-            elif cred.provider == 'gcp':
-                counts = self.get_gcp_counts(cred)
-                stats["gcp_count"] += counts["compute"]
+            if cred.provider in ('aws', 'azure', 'gcp'):
+                stats[f"{cred.provider}_count"] += counts["compute"]
             
             stats["total_instances"] += counts["compute"]
             
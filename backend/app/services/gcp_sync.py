@@ -5,8 +5,8 @@ Fetches real-time resource inventory from Google Cloud using Google Cloud SDK
 from google.oauth2 import service_account
 import googleapiclient.discovery
 from typing import List, Dict, Optional
-from datetime import datetime
 import logging
+import time
 import json
 
 logger = logging.getLogger(__name__)
@@ -203,13 +203,13 @@ class GCPResourceSync:
         Returns:
             Dict with status, response_time_ms, error_message
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter_ns()
         
         try:
             # Simple API call to check connectivity
             self.compute.zones().list(project=self.project_id).execute()
             
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
+            response_time = (time.perf_counter_ns() - start_time) // 1_000_000
             
             return {
                 'status': 'healthy' if response_time < 1000 else 'degraded',
@@ -217,7 +217,7 @@ class GCPResourceSync:
                 'error_message': None
             }
         except Exception as e:
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
+            response_time = (time.perf_counter_ns() - start_time) // 1_000_000
             return {
                 'status': 'error',
                 'response_time_ms': int(response_time),
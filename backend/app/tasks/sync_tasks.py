@@ -7,17 +7,31 @@ from celery.schedules import crontab
 from sqlalchemy.orm import Session
 from app.db.base import SessionLocal
 from app.models.credential import CloudCredential
-from app.models.resource_inventory import ResourceInventory, ProviderHealth
+from app.models.resource_inventory import ResourceInventory, ProviderHealth, CostDataDaily
 from app.services.aws_sync import AWSResourceSync
 from app.services.azure_sync import AzureResourceSync
 from app.services.gcp_sync import GCPResourceSync
+from app.core import cache
 from app.core.security import decrypt_data
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Iterable
 import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Days of cost_data_daily recomputed by each roll-up run: the whole window the
+# dashboard reads, since providers revise costs after the fact
+COST_ROLLUP_DAYS = 60
+
+# Lifetime of the per-user roll-up versions read by the dashboard ETag; an
+# expired version only costs one extra recompute
+COST_ROLLUP_VERSION_TTL = 2 * 24 * 3600
+
+# Streamed sync results are written to the inventory in batches of this size
+SYNC_BATCH_SIZE = 500
+
 
 @shared_task(name="sync_all_users_resources")
 def sync_all_users_resources():
@@ -106,19 +120,15 @@ def sync_aws_resources(credential_id: int, user_id: int):
             return
         
         # Sync EC2 instances
-        instances = aws_sync.sync_ec2_instances()
-        for instance in instances:
-            _upsert_resource_inventory(db, user_id, 'aws', instance)
+        _upsert_in_batches(db, aws_sync.iter_ec2_instances_all_regions(), user_id, 'aws')
         
         # Sync S3 buckets
         buckets = aws_sync.sync_s3_buckets()
-        for bucket in buckets:
-            _upsert_resource_inventory(db, user_id, 'aws', bucket)
+        ResourceInventory.bulk_upsert(db, buckets, user_id, 'aws')
         
         # Sync VPCs
         vpcs = aws_sync.sync_vpcs()
-        for vpc in vpcs:
-            _upsert_resource_inventory(db, user_id, 'aws', vpc)
+        ResourceInventory.bulk_upsert(db, vpcs, user_id, 'aws')
         
         db.commit()
         logger.info(f"Successfully synced AWS resources for user {user_id}")
@@ -167,19 +177,14 @@ def sync_azure_resources(credential_id: int, user_id: int):
             return
         
         # Sync VMs
-        vms = azure_sync.sync_vms()
-        for vm in vms:
-            _upsert_resource_inventory(db, user_id, 'azure', vm)
+        _upsert_in_batches(db, azure_sync.iter_vms(), user_id, 'azure')
         
         # Sync storage accounts
-        storage_accounts = azure_sync.sync_storage_accounts()
-        for account in storage_accounts:
-            _upsert_resource_inventory(db, user_id, 'azure', account)
+        _upsert_in_batches(db, azure_sync.iter_storage_accounts(), user_id, 'azure')
         
         # Sync resource groups
         resource_groups = azure_sync.sync_resource_groups()
-        for rg in resource_groups:
-            _upsert_resource_inventory(db, user_id, 'azure', rg)
+        ResourceInventory.bulk_upsert(db, resource_groups, user_id, 'azure')
         
         db.commit()
         logger.info(f"Successfully synced Azure resources for user {user_id}")
@@ -224,18 +229,15 @@ def sync_gcp_resources(credential_id: int, user_id: int):
         
         # Sync Compute Engine instances
         instances = gcp_sync.sync_compute_instances()
-        for instance in instances:
-            _upsert_resource_inventory(db, user_id, 'gcp', instance)
+        ResourceInventory.bulk_upsert(db, instances, user_id, 'gcp')
         
         # Sync Cloud Storage buckets
         buckets = gcp_sync.sync_storage_buckets()
-        for bucket in buckets:
-            _upsert_resource_inventory(db, user_id, 'gcp', bucket)
+        ResourceInventory.bulk_upsert(db, buckets, user_id, 'gcp')
         
         # Sync VPC networks
         networks = gcp_sync.sync_networks()
-        for network in networks:
-            _upsert_resource_inventory(db, user_id, 'gcp', network)
+        ResourceInventory.bulk_upsert(db, networks, user_id, 'gcp')
         
         db.commit()
         logger.info(f"Successfully synced GCP resources for user {user_id}")
@@ -247,36 +249,49 @@ def sync_gcp_resources(credential_id: int, user_id: int):
         db.close()
 
 
-def _upsert_resource_inventory(db: Session, user_id: int, provider: str, resource_data: dict):
+@shared_task(name="rollup_cost_data_daily")
+def rollup_cost_data_daily(days: int = COST_ROLLUP_DAYS):
     """
-    Insert or update resource in inventory
+    Refresh the daily cost roll-up read by the dashboard
+    
+    The first run on an empty roll-up table backfills every day of cost data.
     
     Args:
-        db: Database session
-        user_id: User ID
-        provider: Cloud provider
-        resource_data: Resource data dictionary
+        days: Number of past days (plus today) to recompute
     """
-    existing = db.query(ResourceInventory).filter(
-        ResourceInventory.user_id == user_id,
-        ResourceInventory.provider == provider,
-        ResourceInventory.resource_id == resource_data['resource_id']
-    ).first()
-    
-    if existing:
-        # Update existing resource
-        for key, value in resource_data.items():
-            if hasattr(existing, key):
-                setattr(existing, key, value)
-        existing.last_synced_at = datetime.utcnow()
-    else:
-        # Create new resource
-        inventory = ResourceInventory(
-            user_id=user_id,
-            provider=provider,
-            **resource_data
-        )
-        db.add(inventory)
+    db = SessionLocal()
+    try:
+        if db.query(CostDataDaily.id).first() is None:
+            user_ids = CostDataDaily.refresh(db)
+            db.commit()
+            logger.info("Backfilled daily costs from all cost data")
+        else:
+            today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            user_ids = CostDataDaily.refresh(db, today - timedelta(days=days))
+            db.commit()
+            logger.info(f"Rolled up daily costs for the last {days} days")
+        
+        # Moves the dashboard ETag of every user whose totals were rewritten
+        version = time.time()
+        for user_id in user_ids:
+            cache.set_json(cache.cost_rollup_version_key(user_id), version, COST_ROLLUP_VERSION_TTL)
+    except Exception as e:
+        logger.error(f"Error rolling up daily costs: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _upsert_in_batches(db: Session, resources: Iterable[dict], user_id: int, provider: str) -> None:
+    """Upsert streamed sync results SYNC_BATCH_SIZE rows at a time"""
+    batch = []
+    for resource in resources:
+        batch.append(resource)
+        if len(batch) >= SYNC_BATCH_SIZE:
+            ResourceInventory.bulk_upsert(db, batch, user_id, provider)
+            batch = []
+    if batch:
+        ResourceInventory.bulk_upsert(db, batch, user_id, provider)
 
 
 def _upsert_provider_health(db: Session, user_id: int, provider: str, 
@@ -327,3 +342,9 @@ def setup_periodic_tasks(sender, **kwargs):
         sync_all_users_resources.s(),
         name='sync-all-resources-every-10-minutes'
     )
+    
+    sender.add_periodic_task(
+        crontab(minute=30),  # Every hour
+        rollup_cost_data_daily.s(),
+        name='rollup-cost-data-daily-every-hour'
+    )
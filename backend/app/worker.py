@@ -9,6 +9,7 @@ from app.tasks.sync_tasks import (
     sync_aws_resources,
     sync_azure_resources,
     sync_gcp_resources,
+    rollup_cost_data_daily,
     setup_periodic_tasks
 )
 
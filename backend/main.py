@@ -1,14 +1,20 @@
 import logging
 import os
 
+import anyio.to_thread
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.formparsers import MultiPartParser
 from starlette.middleware.sessions import SessionMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.api.endpoints import auth
 from app.db.base import engine, Base
 from app.db.migrate import ensure_user_columns, ensure_project_columns, ensure_resource_columns
+from app.core.rate_limit import limiter
 
 from app.models import user, resource, credential, resource_inventory, blueprint
 
@@ -16,7 +22,23 @@ from app.models import user, resource, credential, resource_inventory, blueprint
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Nebula API")
+app = FastAPI(title="Nebula API", default_response_class=ORJSONResponse)
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+# Sync endpoints run on AnyIO's worker threads, 40 by default. The storage, VM
+# and messaging endpoints spend most of that time waiting on AWS, so allow more
+# of them in flight per worker process.
+THREADPOOL_MAX_WORKERS = int(os.getenv("THREADPOOL_MAX_WORKERS", "100"))
+
+# Uploaded files are parsed into SpooledTemporaryFiles that move to disk past
+# 1 MiB by default. The storage endpoints stream them straight on to S3, so
+# keep typical uploads in memory instead of writing and re-reading a temp file.
+MultiPartParser.spool_max_size = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(32 * 1024 * 1024)))
+
+@app.on_event("startup")
+async def configure_threadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_MAX_WORKERS
 
 # GLOBAL ERROR LOGGER for CloudWatch
 @app.middleware("http")
@@ -115,6 +137,13 @@ async def debug_celery():
 async def health():
     return {"status": "healthy"}
 
+@app.exception_handler(SQLAlchemyError)
+async def database_exception_handler(request: Request, exc: SQLAlchemyError):
+    # Endpoints let database errors propagate so the session/pool see them and
+    # can invalidate broken connections; details stay in the logs only.
+    logger.exception("Database error on %s %s", request.method, request.url.path)
+    return JSONResponse(status_code=500, content={"detail": "A database error occurred"})
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     logger.exception("Unhandled server exception on %s %s", request.method, request.url.path)
@@ -55,6 +55,8 @@ const VMDetailPage: React.FC = () => {
     queryFn: async () => {
       const response = await axios.get(`/inventory/${id}`);
       const data = response.data;
+      // Synced inventory stores launch_time as epoch seconds
+      const launchTime = data.metadata?.launch_time ?? data.launch_time;
       return {
         ...data,
         resource_name: formatDisplayValue(data.resource_name ?? data.name ?? 'Unnamed VM', 'Unnamed VM'),
@@ -69,7 +71,9 @@ const VMDetailPage: React.FC = () => {
           private_ip: formatDisplayValue(data.metadata?.private_ip ?? data.private_ip, ''),
           vpc_id: formatDisplayValue(data.metadata?.vpc_id ?? data.vpc_id, ''),
           subnet_id: formatDisplayValue(data.metadata?.subnet_id ?? data.subnet_id, ''),
-          launch_time: formatDisplayValue(data.metadata?.launch_time ?? data.launch_time, ''),
+          launch_time: typeof launchTime === 'number'
+            ? new Date(launchTime * 1000).toISOString()
+            : formatDisplayValue(launchTime, ''),
           cost_per_hour: data.metadata?.cost_per_hour ?? data.cost_per_hour,
           security_groups: data.metadata?.security_groups ?? data.security_groups,
           tags: data.metadata?.tags ?? data.tags,